@@ -0,0 +1,64 @@
+import random
+import sys
+import time
+
+import degrees
+from util import Node, QueueFrontier, IndexedQueueFrontier
+
+FRONTIERS = [QueueFrontier, IndexedQueueFrontier]
+QUERIES = 5
+OPERATIONS = 20000
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark_frontier.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else QUERIES
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    # Raw frontier operations, independent of the dataset
+    print(f"Frontier operations (n = {OPERATIONS})")
+    for frontier_class in FRONTIERS:
+        elapsed = time_operations(frontier_class, OPERATIONS)
+        print(f"  {frontier_class.__name__}: {elapsed * 1000:.2f} ms")
+
+    # Full shortest path queries over the same random pairs
+    random.seed(0)
+    person_ids = list(degrees.people)
+    pairs = [random.sample(person_ids, 2) for _ in range(queries)]
+    print(f"Shortest path queries (n = {queries})")
+    for frontier_class in FRONTIERS:
+        elapsed = time_queries(frontier_class, pairs)
+        print(f"  {frontier_class.__name__}: {elapsed * 1000:.2f} ms")
+
+
+def time_operations(frontier_class, n):
+    """
+    Time `n` adds followed by `n` membership checks and removals.
+    """
+    start = time.perf_counter()
+    frontier = frontier_class()
+    for i in range(n):
+        frontier.add(Node(state=i, parent=None, action=None))
+    for i in range(n):
+        frontier.contains_state(i)
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def time_queries(frontier_class, pairs):
+    """
+    Time degrees.shortest_path over every (source, target) pair.
+    """
+    start = time.perf_counter()
+    for source, target in pairs:
+        degrees.shortest_path(source, target, frontier_class=frontier_class)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
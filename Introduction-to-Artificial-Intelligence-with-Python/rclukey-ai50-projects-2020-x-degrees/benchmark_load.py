@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+
+# Loader names mapped to the degrees.py flags that select them
+LOADERS = {
+    "dict": [],
+    "dict, threaded": ["--threaded"],
+    "compact": ["--compact"],
+    "compact, threaded": ["--compact", "--threaded"]
+}
+
+# Loads one dataset in a fresh process so peak memory is its own
+CHILD = """
+import json, sys, time
+import degrees
+directory, compact, threaded = sys.argv[1], sys.argv[2] == "1", sys.argv[3] == "1"
+start = time.perf_counter()
+if compact:
+    degrees.load_compact_data(directory, threaded)
+else:
+    degrees.load_data(directory, threaded)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "peak_mib": degrees.peak_memory()}))
+"""
+
+
+def main():
+    directories = sys.argv[1:] or ["small", "large"]
+    print(f"{'directory':<12} {'loader':<18} {'seconds':>8} {'peak MiB':>9}")
+    for directory in directories:
+        for loader, flags in LOADERS.items():
+            result = measure(directory, "--compact" in flags, "--threaded" in flags)
+            peak = "n/a" if result["peak_mib"] is None else f"{result['peak_mib']:.1f}"
+            print(f"{directory:<12} {loader:<18} {result['seconds']:>8.2f} {peak:>9}")
+
+
+def measure(directory, compact, threaded):
+    """
+    Load `directory` in a child process and return its load time and
+    peak resident memory.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, directory, str(int(compact)), str(int(threaded))],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import argparse
 import csv
+import json
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from fuzzy import NameIndex
+from graph import Graph
+from snapshot import default_path, load_snapshot, write_snapshot
+from util import Node, IndexedQueueFrontier
+from util import BackgroundReader, peak_memory, read_chunks
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,54 +19,134 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
-def load_data(directory):
+# Compact integer-indexed Graph, used instead of the dictionaries when loaded
+graph = None
+
+# Prefix and fuzzy index over lowercase names, for suggesting near misses
+name_index = None
+
+def load_data(directory, threaded=False):
     """
     Load data from CSV files into memory.
+    With `threaded`, stars.csv is parsed on a worker thread
+    while people.csv and movies.csv are loaded.
     """
+    if threaded:
+        stars = BackgroundReader(f"{directory}/stars.csv", ["person_id", "movie_id"])
+    else:
+        stars = read_chunks(f"{directory}/stars.csv", ["person_id", "movie_id"])
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
+    for chunk in read_chunks(f"{directory}/people.csv", ["id", "name", "birth"]):
+        for person_id, name, birth in chunk:
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            key = name.lower()
+            person_ids = names.get(key)
+            if person_ids is None:
+                names[key] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                person_ids.add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
+    for chunk in read_chunks(f"{directory}/movies.csv", ["id", "title", "year"]):
+        for movie_id, title, year in chunk:
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
                 "stars": set()
             }
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    for chunk in stars:
+        for person_id, movie_id in chunk:
+            person = people.get(person_id)
+            movie = movies.get(movie_id)
+            if person is None or movie is None:
+                continue
+            person["movies"].add(movie_id)
+            movie["stars"].add(person_id)
+
+
+def load_compact_data(directory, threaded=False):
+    """
+    Load data from CSV files into a compact Graph.
+    """
+    global graph
+    graph = Graph.from_csv(directory, threaded)
+
+
+def load_cached_data(directory, path):
+    """
+    Map the snapshot at `path` as the compact Graph.
+    Returns False if it is missing or out of date with the CSV files.
+    """
+    global graph
+    graph = load_snapshot(directory, path)
+    return graph is not None
+
+
+# Search engines selectable from the command line
+ENGINES = ["bfs", "bidirectional"]
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [--engine {bfs,bidirectional}] [--compact] "
+              "[--threaded] [--build-cache] [--cache PATH] [--batch FILE] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--engine", choices=ENGINES, default="bfs")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--threaded", action="store_true")
+    parser.add_argument("--build-cache", action="store_true")
+    parser.add_argument("--cache")
+    parser.add_argument("--batch")
+    args = parser.parse_args()
+    directory = args.directory
+    cache = args.cache or default_path(directory)
+
+    # Keep stdout clean for JSON lines in batch mode
+    status = sys.stderr if args.batch else sys.stdout
+
+    # Write a snapshot of the compact graph for later runs to map
+    if args.build_cache:
+        print("Building cache...")
+        load_compact_data(directory, args.threaded)
+        write_snapshot(graph, directory, cache)
+        print(f"Cache written to {cache}.")
+        return
+
+    # Load data from files into memory, or map a current snapshot
+    print("Loading data...", file=status)
+    start = time.perf_counter()
+    if load_cached_data(directory, cache):
+        print("Data mapped from cache.", file=status)
+    elif args.compact:
+        load_compact_data(directory, args.threaded)
+        usage = graph.memory_usage()
+        print(f"Data loaded ({usage['adjacency'] / 2 ** 20:.1f} MiB adjacency, "
+              f"{usage['tables'] / 2 ** 20:.1f} MiB tables).", file=status)
+    else:
+        load_data(directory, args.threaded)
+        print("Data loaded.", file=status)
+    elapsed = time.perf_counter() - start
+    peak = peak_memory()
+    if peak is None:
+        print(f"Load took {elapsed:.2f} s.", file=status)
+    else:
+        print(f"Load took {elapsed:.2f} s, peak memory {peak:.1f} MiB.", file=status)
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,7 +155,13 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    start = time.perf_counter()
+    if args.engine == "bidirectional":
+        path = bidirectional_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
+    elapsed = time.perf_counter() - start
+    print(f"Search ({args.engine}) took {elapsed * 1000:.2f} ms.")
 
     if path is None:
         print("Not connected.")
@@ -77,22 +170,24 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person(path[i][1])["name"]
+            person2 = person(path[i + 1][1])["name"]
+            movie = movie_for_id(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, frontier_class=IndexedQueueFrontier):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
+    if graph is not None:
+        return graph.shortest_path(source, target)
     
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = frontier_class()
     frontier.add(start)
     
     explored = set()
@@ -122,20 +217,237 @@ def shortest_path(source, target):
         explored.add(current_node.state)
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional=True)
+
+    if source == target:
+        return []
+
+    # Maps each reached person to (movie_id, person_id) of the step
+    # towards the source (forward) or towards the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller side, it is the cheaper one to expand
+        if len(forward_layer) <= len(backward_layer):
+            parents, depth, other_depth = forward, forward_depth, backward_depth
+            layer = forward_layer
+        else:
+            parents, depth, other_depth = backward, backward_depth, forward_depth
+            layer = backward_layer
+
+        # Expand one whole layer, collecting every place the searches meet
+        next_layer = []
+        meeting = None
+        best = None
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                depth[neighbor] = depth[person_id] + 1
+                next_layer.append(neighbor)
+                if neighbor in other_depth:
+                    length = depth[neighbor] + other_depth[neighbor]
+                    if best is None or length < best:
+                        best = length
+                        meeting = neighbor
+
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+        if parents is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through `meeting` from the
+    parent links of a bidirectional search.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+
+    return path
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dictionary mapping each of `targets` to the shortest list
+    of (movie_id, person_id) pairs that connect the source to it,
+    or None if it is not connected. One breadth-first search tree from
+    the source is shared by every target.
+    """
+    if graph is not None:
+        return graph.shortest_paths(source, targets)
+
+    remaining = set(targets)
+    paths = {}
+
+    # Maps each reached person to the (movie_id, person_id) step towards source
+    parents = {source: None}
+    layer = [source]
+    if source in remaining:
+        remaining.discard(source)
+        paths[source] = []
+
+    while layer and remaining:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                next_layer.append(neighbor)
+                if neighbor in remaining:
+                    remaining.discard(neighbor)
+                    paths[neighbor] = unwind(parents, neighbor)
+        layer = next_layer
+
+    for target in remaining:
+        paths[target] = None
+    return paths
+
+
+def unwind(parents, person_id):
+    """
+    Follows `parents` links from a person back to the search source,
+    returning the (movie_id, person_id) path.
+    """
+    path = []
+    while parents[person_id] is not None:
+        movie_id, parent = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+    return path
+
+
+def run_batch(lines, out):
+    """
+    Answers every "source,target" pair in `lines`, writing one JSON
+    object per pair to `out`. Sources and targets may be person IDs or
+    names; a name shared by several people is an error listing their
+    IDs. Pairs are grouped by source so that each source is searched
+    only once.
+    """
+    groups = {}
+    for row in csv.reader(lines):
+        if not row or not "".join(row).strip():
+            continue
+        if len(row) != 2:
+            write_result(out, {"input": row, "error": "expected source,target"})
+            continue
+        source, target = (value.strip() for value in row)
+        groups.setdefault(source, []).append(target)
+
+    for source, targets in groups.items():
+        source_ids = resolve_person(source)
+        target_ids = {target: resolve_person(target) for target in targets}
+        if len(source_ids) != 1:
+            paths = {}
+        else:
+            paths = shortest_paths(
+                source_ids[0], [ids[0] for ids in target_ids.values() if len(ids) == 1]
+            )
+
+        for target in targets:
+            result = {"source": source, "target": target}
+            error = (resolve_error("source", source_ids)
+                     or resolve_error("target", target_ids[target]))
+            if error is not None:
+                result.update(error)
+            else:
+                source_id, target_id = source_ids[0], target_ids[target][0]
+                path = paths[target_id]
+                result["source_id"] = source_id
+                result["target_id"] = target_id
+                result["degrees"] = None if path is None else len(path)
+                result["path"] = path
+            write_result(out, result)
+
+
+def write_result(out, result):
+    """
+    Writes one batch result as a line of JSON and flushes it.
+    """
+    out.write(json.dumps(result) + "\n")
+    out.flush()
+
+
+def resolve_person(value):
+    """
+    Returns the sorted list of person_ids an ID or name could mean,
+    without prompting: one for an ID or unambiguous name, none if
+    nobody matches, and several if the name is shared.
+    """
+    if graph is not None:
+        if value in graph.person_lookup:
+            return [value]
+        return sorted(graph.people_named(value))
+    if value in people:
+        return [value]
+    return sorted(names.get(value.lower(), set()))
+
+
+def resolve_error(role, person_ids):
+    """
+    Returns the error for a `role` ("source" or "target") that resolved
+    to `person_ids`, or None if it names exactly one person.
+    """
+    if len(person_ids) == 0:
+        return {"error": f"{role} not found"}
+    if len(person_ids) > 1:
+        return {"error": f"{role} ambiguous", "candidates": person_ids}
+    return None
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.people_named(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        return suggest_person(name)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            details = person(person_id)
+            name = details["name"]
+            birth = details["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -148,11 +460,52 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def build_name_index():
+    """
+    Build the fuzzy name index over every loaded name.
+    """
+    global name_index
+    if graph is not None:
+        name_index = NameIndex(name.lower() for name in graph.person_names)
+    else:
+        name_index = NameIndex(names)
+
+
+def suggest_person(name):
+    """
+    Offers the names closest to a name that was not found,
+    returning the IMDB id for the one chosen, or None.
+    The name index is only built the first time it is needed.
+    """
+    if not name.strip():
+        return None
+    if name_index is None:
+        build_name_index()
+    suggestions = name_index.suggest(name)
+    if not suggestions:
+        return None
+
+    print(f"No exact match for '{name}'. Did you mean:")
+    for i, suggestion in enumerate(suggestions, 1):
+        person_ids = graph.people_named(suggestion) if graph is not None else names[suggestion]
+        print(f"{i}: {person(next(iter(person_ids)))['name']}")
+    try:
+        choice = int(input("Intended Number: "))
+        if 1 <= choice <= len(suggestions):
+            return person_id_for_name(suggestions[choice - 1])
+    except ValueError:
+        pass
+    return None
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -160,5 +513,23 @@ def neighbors_for_person(person_id):
             neighbors.add((movie_id, person_id))
     return neighbors
 
+
+def person(person_id):
+    """
+    Returns a dictionary of name and birth for a person.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_for_id(movie_id):
+    """
+    Returns a dictionary of title and year for a movie.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
 if __name__ == "__main__":
     main()
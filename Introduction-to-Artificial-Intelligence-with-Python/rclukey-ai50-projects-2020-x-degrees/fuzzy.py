@@ -0,0 +1,283 @@
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+# Number of suggestions returned by default
+LIMIT = 5
+
+# Suggestions may be one edit from the query for every this many letters
+LETTERS_PER_EDIT = 5
+
+# Trigrams in more than one name in this many are also kept as bitmaps
+COMMON = 32
+
+# Longest query whose edit distances are computed in 64-bit lanes
+WORD = 63
+
+# Most names whose edit distances are computed at once across bounds
+BATCH = 2048
+
+# Posting of a trigram no name has
+NOWHERE = np.zeros(0, dtype=np.int32)
+
+
+class NameIndex():
+    """
+    Index over lowercase names for prefix and fuzzy lookup.
+
+    Names are kept sorted for prefix search by bisection, and every
+    trigram of a padded name maps to the array of names containing it.
+    Fuzzy lookup counts the trigrams each name shares with the query,
+    rare ones from their postings and common ones from bitmaps, and
+    computes exact edit distances for the names whose counts leave them
+    close enough, many names at a time.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(set(names))
+        self.lengths = np.array([len(name) for name in self.names], dtype=np.int64)
+        self.sizes = np.zeros(len(self.names), dtype=np.int64)
+        postings = {}
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.sizes[i] = len(grams)
+            for trigram in grams:
+                posting = postings.get(trigram)
+                if posting is None:
+                    postings[trigram] = array("i", [i])
+                else:
+                    posting.append(i)
+        self.trigrams = {
+            trigram: np.frombuffer(posting, dtype=np.int32)
+            for trigram, posting in postings.items()
+        }
+
+        # Trigrams in many names also get one bit per name, which takes no
+        # more memory than their posting and is quicker to test
+        self.bitmaps = {}
+        for trigram, posting in self.trigrams.items():
+            if len(posting) * COMMON > len(self.names):
+                bits = np.zeros(len(self.names), dtype=bool)
+                bits[posting] = True
+                self.bitmaps[trigram] = np.packbits(bits, bitorder="little")
+
+        # Every name's letters numbered from 1, one name after another and
+        # followed by zeros, so that any name can be read past its end
+        points = np.frombuffer("".join(self.names).encode("utf-32-le"), dtype=np.uint32)
+        letters = np.flatnonzero(np.bincount(points))
+        self.numbers = {chr(point): k for k, point in enumerate(letters.tolist(), 1)}
+        self.codes = np.zeros(
+            len(points) + int(self.lengths.max(initial=0)),
+            dtype=np.min_scalar_type(len(letters))
+        )
+        self.codes[:len(points)] = np.searchsorted(letters, points) + 1
+        self.offsets = np.zeros(len(self.names), dtype=np.int64)
+        np.cumsum(self.lengths[:-1], out=self.offsets[1:])
+
+    def prefixed(self, prefix, limit=LIMIT):
+        """
+        Return up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.names, prefix)
+        while i < len(self.names) and len(matches) < limit:
+            if not self.names[i].startswith(prefix):
+                break
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def suggest(self, query, limit=LIMIT):
+        """
+        Return up to `limit` names closest to `query`: prefix matches
+        first, then names within a small edit distance, nearest first
+        and alphabetically among equals.
+        """
+        query = query.lower().strip()
+        suggestions = self.prefixed(query, limit)
+        if len(suggestions) >= limit:
+            return suggestions
+
+        grams = sorted(trigrams(query), key=lambda t: len(self.trigrams.get(t, ())))
+        cutoff = min(max(2, len(query) // LETTERS_PER_EDIT), len(query) // 3)
+        candidates, bounds = self.within(grams, len(query), cutoff)
+
+        # Measure the names a bound at a time, or several bounds at once
+        # while they hold few names, stopping once no name left can be as
+        # close as the ones found
+        order = np.argsort(bounds, kind="stable")
+        candidates, bounds = candidates[order], bounds[order]
+        starts = np.searchsorted(bounds, np.arange(cutoff + 2))
+        found, distances = [], []
+        bound = 0
+        while bound <= cutoff:
+            end = bound + 1
+            while end <= cutoff and starts[end + 1] - starts[bound] <= BATCH:
+                end += 1
+            batch = candidates[starts[bound]:starts[end]]
+            if len(batch) > 0:
+                measured = self.distances(query, batch)
+                close = measured <= cutoff
+                found.append(batch[close])
+                distances.append(measured[close])
+            bound = end
+            if sum(len(d) for d in distances) >= limit:
+                if np.partition(np.concatenate(distances), limit - 1)[limit - 1] < bound:
+                    break
+        if not found:
+            return suggestions
+
+        # Names are indexed in order, so ties come out alphabetically
+        found, distances = np.concatenate(found), np.concatenate(distances)
+        for i in found[np.lexsort((found, distances))].tolist():
+            if len(suggestions) >= limit:
+                break
+            if self.names[i] not in suggestions:
+                suggestions.append(self.names[i])
+        return suggestions
+
+    def within(self, grams, length, cutoff):
+        """
+        Return the names that could be within `cutoff` edits of a name of
+        `length` letters whose trigrams, rarest first, are `grams`, and a
+        lower bound on each one's edit distance. Names must share a trigram.
+        """
+        # A name within `cutoff` edits lacks at most three of the trigrams
+        # per edit, so has one of the rarest 3 * cutoff + 1. Those and any
+        # others without bitmaps are counted for every name that has them,
+        # and only the names which could still have enough are tested for
+        # the common ones
+        common = [t for t in grams[3 * cutoff + 1:] if t in self.bitmaps]
+        rare = grams[:len(grams) - len(common)]
+        named = np.sort(np.concatenate([self.trigrams.get(t, NOWHERE) for t in rare]))
+        starts = np.flatnonzero(np.diff(named, prepend=-1))
+        shared = np.diff(starts, append=len(named))
+        keep = shared >= len(rare) - 3 * cutoff
+        candidates, shared = named[starts[keep]], shared[keep]
+        keep = np.abs(self.lengths[candidates] - length) <= cutoff
+        candidates, shared = candidates[keep], shared[keep]
+        for i, trigram in enumerate(common, 1):
+            shared += self.contains(trigram, candidates)
+            keep = shared >= len(rare) + i - 3 * cutoff
+            candidates, shared = candidates[keep], shared[keep]
+
+        # Each edit changes at most three trigrams of either name, so the
+        # trigrams missing from the larger set bound the edit distance
+        # from below, as does the difference in length
+        bounds = np.maximum(
+            (np.maximum(self.sizes[candidates], len(grams)) - shared + 2) // 3,
+            np.abs(self.lengths[candidates] - length)
+        )
+        keep = bounds <= cutoff
+        return candidates[keep], bounds[keep]
+
+    def contains(self, trigram, indices):
+        """
+        Return whether each name in `indices` has the common `trigram`.
+        """
+        bitmap = self.bitmaps[trigram]
+        return ((bitmap[indices >> 3] >> (indices & 7)) & 1).astype(bool)
+
+    def distances(self, query, indices):
+        """
+        Return the edit distance from `query` to each name in `indices`.
+
+        Myers' bit-parallel algorithm is run on every name at once: each
+        name's column of the distance table is held as the bits of two
+        64-bit integers, and a step reads one letter from every name.
+        """
+        if not query or len(query) > WORD:
+            return np.array([
+                edit_distance(query, self.names[i], len(query) + self.lengths[i])
+                for i in indices.tolist()
+            ], dtype=np.int64)
+
+        # Bit i of peq[k] is set where query[i] is letter k, and peq[0],
+        # for the end of a name, is empty
+        peq = np.zeros(len(self.numbers) + 1, dtype=np.uint64)
+        for i, c in enumerate(query):
+            if c in self.numbers:
+                peq[self.numbers[c]] |= np.uint64(1 << i)
+        mask = np.uint64((1 << len(query)) - 1)
+        last = np.uint64(1 << (len(query) - 1))
+        one = np.uint64(1)
+
+        # Row j holds the entry in peq for letter j of every name
+        lengths = self.lengths[indices]
+        eqs = peq[self.codes[self.offsets[indices] + np.arange(lengths.max())[:, None]]]
+
+        # Vertical deltas of every name's current column, +1 in pv and -1 in mv
+        pv = np.full(len(indices), mask, dtype=np.uint64)
+        mv = np.zeros(len(indices), dtype=np.uint64)
+        distance = np.full(len(indices), len(query), dtype=np.int64)
+        history = np.empty(eqs.shape, dtype=np.int64)
+        for j, eq in enumerate(eqs):
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            distance += (ph & last) != 0
+            distance -= (mh & last) != 0
+            ph = ph << one | one
+            pv = (mh << one | ~(xv | ph)) & mask
+            mv = ph & xv & mask
+            history[j] = distance
+
+        # A name's distance is the one after its last letter
+        return history[lengths - 1, np.arange(len(indices))]
+
+
+def trigrams(name):
+    """
+    Return the set of trigrams of `name`, padded so that its first and
+    last letters form trigrams of their own.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, cutoff):
+    """
+    Return the Levenshtein distance between `a` and `b`, or None if it
+    exceeds `cutoff`.
+
+    Uses Myers' bit-parallel algorithm: each column of the distance
+    table is held as the bits of two integers, so a whole column costs
+    a handful of integer operations rather than a loop over `a`.
+    """
+    if abs(len(a) - len(b)) > cutoff:
+        return None
+    if not a:
+        return len(b)
+
+    # Bit i of peq[c] is set where a[i] == c
+    peq = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | 1 << i
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+
+    # Vertical deltas of the current column, +1 in pv and -1 in mv
+    pv, mv = mask, 0
+    distance = len(a)
+    for j, c in enumerate(b, 1):
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+
+        # Each letter of b left can lower the distance by at most one
+        if distance - (len(b) - j) > cutoff:
+            return None
+        ph = ph << 1 | 1
+        pv = (mh << 1 | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+
+    return distance if distance <= cutoff else None
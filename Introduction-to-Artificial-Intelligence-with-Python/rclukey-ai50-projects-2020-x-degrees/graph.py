@@ -0,0 +1,376 @@
+import sys
+from array import array
+from collections import deque
+
+from util import BackgroundReader, read_chunks
+
+
+class Graph():
+    """
+    Compact form of the actor-movie graph.
+
+    Person and movie IDs are interned to dense integers, and adjacency is
+    kept in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the stars
+    of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_lookup, movie_lookup, name_lookup):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Map person_id, movie_id and lowercase name to dense indices
+        self.person_lookup = person_lookup
+        self.movie_lookup = movie_lookup
+        self.name_lookup = name_lookup
+
+    @classmethod
+    def from_csv(cls, directory, threaded=False):
+        """
+        Graph.from_csv(directory) loads people.csv, movies.csv and
+        stars.csv from `directory` into a new Graph. With `threaded`,
+        stars.csv is parsed on a worker thread while the others load.
+        """
+        if threaded:
+            stars = BackgroundReader(f"{directory}/stars.csv", ["person_id", "movie_id"])
+        else:
+            stars = read_chunks(f"{directory}/stars.csv", ["person_id", "movie_id"])
+
+        person_ids, person_names, person_births = [], [], []
+        person_lookup, name_lookup = {}, {}
+        for chunk in read_chunks(f"{directory}/people.csv", ["id", "name", "birth"]):
+            for person_id, name, birth in chunk:
+                p = len(person_ids)
+                person_lookup[person_id] = p
+                key = name.lower()
+                matches = name_lookup.get(key)
+                if matches is None:
+                    name_lookup[key] = [p]
+                else:
+                    matches.append(p)
+                person_ids.append(person_id)
+                person_names.append(name)
+                person_births.append(birth)
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_lookup = {}
+        for chunk in read_chunks(f"{directory}/movies.csv", ["id", "title", "year"]):
+            for movie_id, title, year in chunk:
+                movie_lookup[movie_id] = len(movie_ids)
+                movie_ids.append(movie_id)
+                movie_titles.append(title)
+                movie_years.append(year)
+
+        # Interned (person, movie) pairs, skipping unknown IDs
+        pair_people, pair_movies = array("i"), array("i")
+        for chunk in stars:
+            for person_id, movie_id in chunk:
+                person = person_lookup.get(person_id)
+                movie = movie_lookup.get(movie_id)
+                if person is None or movie is None:
+                    continue
+                pair_people.append(person)
+                pair_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(len(person_ids), pair_people, pair_movies)
+        movie_offsets, movie_stars = build_csr(len(movie_ids), pair_movies, pair_people)
+
+        return cls(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            person_offsets, person_movies, movie_offsets, movie_stars,
+            person_lookup, movie_lookup, name_lookup
+        )
+
+    def person(self, person_id):
+        """
+        Return a dictionary of name and birth for `person_id`.
+        """
+        p = self.person_lookup[person_id]
+        return {"name": self.person_names[p], "birth": self.person_births[p]}
+
+    def movie(self, movie_id):
+        """
+        Return a dictionary of title and year for `movie_id`.
+        """
+        m = self.movie_lookup[movie_id]
+        return {"title": self.movie_titles[m], "year": self.movie_years[m]}
+
+    def people_named(self, name):
+        """
+        Return the list of person_ids whose lowercase name is `name`.
+        """
+        return [self.person_ids[p] for p in self.name_lookup.get(name.lower(), [])]
+
+    def neighbors(self, p):
+        """
+        Yield (movie, person) index pairs for people who starred
+        with person index `p`.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                yield m, movie_stars[j]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[m], self.person_ids[q])
+            for m, q in self.neighbors(self.person_lookup[person_id])
+        }
+
+    def path_between(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect person index `source` to `target`, or None.
+        """
+        if source == target:
+            return []
+
+        # Maps each reached person to the (movie, person) step towards source
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            p = queue.popleft()
+            for m, q in self.neighbors(p):
+                if q in parents:
+                    continue
+                parents[q] = (m, p)
+                if q == target:
+                    return self.unwind(parents, target)
+                queue.append(q)
+
+        return None
+
+    def paths_from(self, source, targets):
+        """
+        Returns a dictionary mapping each person index in `targets` to the
+        shortest (movie, person) index path from `source`, or None,
+        growing a single breadth-first search tree until all are found.
+        """
+        remaining = set(targets)
+        paths = {}
+        parents = {source: None}
+        if source in remaining:
+            remaining.discard(source)
+            paths[source] = []
+
+        queue = deque([source])
+        while queue and remaining:
+            p = queue.popleft()
+            for m, q in self.neighbors(p):
+                if q in parents:
+                    continue
+                parents[q] = (m, p)
+                if q in remaining:
+                    remaining.discard(q)
+                    paths[q] = self.unwind(parents, q)
+                queue.append(q)
+
+        for t in remaining:
+            paths[t] = None
+        return paths
+
+    def degree_counts(self, source):
+        """
+        Return a list whose entry `d` is how many people are exactly `d`
+        degrees from person index `source`, searching the whole component.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        # Each person and each movie is expanded at most once
+        seen_people = bytearray(len(person_offsets) - 1)
+        seen_movies = bytearray(len(movie_offsets) - 1)
+        seen_people[source] = 1
+        counts = [1]
+        layer = [source]
+        while layer:
+            next_layer = []
+            for p in layer:
+                for i in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[i]
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_stars[j]
+                        if not seen_people[q]:
+                            seen_people[q] = 1
+                            next_layer.append(q)
+            if next_layer:
+                counts.append(len(next_layer))
+            layer = next_layer
+        return counts
+
+    def unwind(self, parents, p):
+        """
+        Follow `parents` links from `p` back to the start of the search.
+        """
+        path = []
+        while parents[p] is not None:
+            m, parent = parents[p]
+            path.append((m, p))
+            p = parent
+        path.reverse()
+        return path
+
+    def bidirectional_path_between(self, source, target):
+        """
+        Like path_between, but searches from both ends at once and
+        meets in the middle.
+        """
+        if source == target:
+            return []
+
+        forward, backward = {source: None}, {target: None}
+        forward_depth, backward_depth = {source: 0}, {target: 0}
+        forward_layer, backward_layer = [source], [target]
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                parents, depth, other_depth = forward, forward_depth, backward_depth
+                layer = forward_layer
+            else:
+                parents, depth, other_depth = backward, backward_depth, forward_depth
+                layer = backward_layer
+
+            next_layer = []
+            meeting = None
+            best = None
+            for p in layer:
+                for m, q in self.neighbors(p):
+                    if q in parents:
+                        continue
+                    parents[q] = (m, p)
+                    depth[q] = depth[p] + 1
+                    next_layer.append(q)
+                    if q in other_depth:
+                        length = depth[q] + other_depth[q]
+                        if best is None or length < best:
+                            best = length
+                            meeting = q
+
+            if meeting is not None:
+                path = self.unwind(forward, meeting)
+                p = meeting
+                while backward[p] is not None:
+                    m, child = backward[p]
+                    path.append((m, child))
+                    p = child
+                return path
+
+            if parents is forward:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+
+        return None
+
+    def shortest_path(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        search = self.bidirectional_path_between if bidirectional else self.path_between
+        path = search(self.person_lookup[source], self.person_lookup[target])
+        if path is None:
+            return None
+        return [(self.movie_ids[m], self.person_ids[p]) for m, p in path]
+
+    def shortest_paths(self, source, targets):
+        """
+        Returns a dictionary mapping each person_id in `targets` to the
+        shortest list of (movie_id, person_id) pairs from the source,
+        or None if it is not connected.
+        """
+        indices = {self.person_lookup[t]: t for t in targets}
+        paths = self.paths_from(self.person_lookup[source], indices)
+        return {
+            indices[t]: None if path is None else
+            [(self.movie_ids[m], self.person_ids[p]) for m, p in path]
+            for t, path in paths.items()
+        }
+
+    def memory_usage(self):
+        """
+        Return an estimate of the bytes held by the graph, split into
+        adjacency arrays and ID/name tables.
+        """
+        adjacency = sum(
+            len(a) * a.itemsize for a in (
+                self.person_offsets, self.person_movies,
+                self.movie_offsets, self.movie_stars
+            )
+        )
+        tables = 0
+        for table in (self.person_ids, self.person_names, self.person_births,
+                      self.movie_ids, self.movie_titles, self.movie_years,
+                      self.person_lookup, self.movie_lookup, self.name_lookup):
+            tables += table_size(table)
+        return {"adjacency": adjacency, "tables": tables}
+
+
+def table_size(table):
+    """
+    Return the bytes held by a table, either its own `nbytes` for
+    memory-mapped tables or the size of a list or dict and its strings.
+    """
+    if hasattr(table, "nbytes"):
+        return table.nbytes
+    if isinstance(table, dict):
+        return sys.getsizeof(table)
+    return sys.getsizeof(table) + sum(sys.getsizeof(s) for s in table)
+
+
+def build_csr(rows, sources, targets):
+    """
+    Build CSR (offsets, indices) arrays for `rows` rows from parallel
+    arrays of edge `sources` and `targets`, dropping duplicate edges.
+    """
+    # Count edges per row, then turn counts into starting offsets
+    offsets = array("i", bytes(4 * (rows + 1)))
+    for s in sources:
+        offsets[s + 1] += 1
+    for r in range(rows):
+        offsets[r + 1] += offsets[r]
+
+    # Scatter each edge into its row
+    indices = array("i", bytes(4 * len(sources)))
+    cursor = array("i", offsets)
+    for s, t in zip(sources, targets):
+        indices[cursor[s]] = t
+        cursor[s] += 1
+
+    # Sort each row and squeeze out duplicates in place
+    write = 0
+    start = 0
+    for r in range(rows):
+        end = offsets[r + 1]
+        row = sorted(set(indices[start:end]))
+        offsets[r] = write
+        indices[write:write + len(row)] = array("i", row)
+        write += len(row)
+        start = end
+    offsets[rows] = write
+    del indices[write:]
+
+    return offsets, indices
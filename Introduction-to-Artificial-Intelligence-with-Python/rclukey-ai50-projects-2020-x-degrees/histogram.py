@@ -0,0 +1,88 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from graph import Graph
+from snapshot import default_path, load_snapshot
+
+# Graph shared with worker processes; inherited as-is when they are forked
+graph = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python histogram.py [--sources N] [--processes N] [--seed N] "
+              "[--cache PATH] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--sources", type=int)
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache")
+    args = parser.parse_args()
+    cache = args.cache or default_path(args.directory)
+
+    print("Loading data...")
+    init_worker(args.directory, cache)
+    print("Data loaded.")
+
+    # Every person is a source for all pairs, or a random sample of them
+    people = len(graph.person_ids)
+    if args.sources is None or args.sources >= people:
+        sources = range(people)
+    else:
+        sources = random.Random(args.seed).sample(range(people), args.sources)
+
+    start = time.perf_counter()
+    counts = degree_histogram(sources, args.processes, args.directory, cache)
+    elapsed = time.perf_counter() - start
+
+    # Pairs never reached from their source are not connected
+    pairs = len(sources) * (people - 1)
+    connected = sum(counts)
+    print(f"Degrees of separation over {pairs} pairs "
+          f"({len(sources)} sources, {elapsed:.2f} s)")
+    for degree, count in enumerate(counts):
+        if degree > 0:
+            print(f"  {degree}: {count} ({100 * count / pairs:.2f}%)")
+    print(f"  Not connected: {pairs - connected} "
+          f"({100 * (pairs - connected) / pairs:.2f}%)")
+
+
+def init_worker(directory, cache):
+    """
+    Load the graph into this process, unless it was inherited on fork.
+    """
+    global graph
+    if graph is None:
+        graph = load_snapshot(directory, cache) or Graph.from_csv(directory)
+
+
+def source_counts(source):
+    """
+    Return the degree counts from one source, leaving out the source itself.
+    """
+    counts = graph.degree_counts(source)
+    counts[0] = 0
+    return counts
+
+
+def degree_histogram(sources, processes, directory, cache):
+    """
+    Fan a breadth-first search from each of `sources` out over a pool of
+    `processes` workers and return the summed count of pairs at each degree.
+    """
+    totals = []
+    with multiprocessing.Pool(processes, init_worker, (directory, cache)) as pool:
+        chunksize = max(1, len(sources) // (processes * 16))
+        for counts in pool.imap_unordered(source_counts, sources, chunksize):
+            if len(counts) > len(totals):
+                totals.extend([0] * (len(counts) - len(totals)))
+            for degree, count in enumerate(counts):
+                totals[degree] += count
+    return totals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import os
+import sys
+import time
+from array import array
+
+from graph import Graph
+from snapshot import default_path, load_snapshot, map_sections, source_stats, write_sections
+from util import peak_memory
+
+MAGIC = b"DEGLABL2"
+INFINITY = 2 ** 31 - 1
+
+# Saved arrays with their typecodes, in the order the constructor takes
+SECTIONS = [
+    ("order", "i"),
+    ("ranks", "i"),
+    ("offsets", "q"),
+    ("hubs", "i"),
+    ("distances", "B"),
+    ("parents", "i"),
+    ("movies", "i")
+]
+
+# Seconds between progress lines while building
+PROGRESS = 10
+
+
+class HubLabels():
+    """
+    Exact distance index over people, built by pruned landmark labeling.
+
+    People are ranked by co-star count, and every person has a label: a
+    list of (hub, distance) entries with hubs in increasing rank order,
+    stored in CSR form by rank as `hubs[offsets[r]:offsets[r + 1]]`. The
+    distance between two people is the minimum of `d1 + d2` over hubs
+    their labels share. Each entry also records the next (movie, person)
+    step towards its hub, so a shortest path can be read straight off the
+    labels.
+    """
+
+    def __init__(self, order, ranks, offsets, hubs, distances, parents, movies):
+        # Maps hub rank back to person index, and person index to rank
+        self.order = order
+        self.ranks = ranks
+        self.offsets = offsets
+        self.hubs = hubs
+        self.distances = distances
+        self.parents = parents
+        self.movies = movies
+
+    @classmethod
+    def build(cls, graph, progress=None):
+        """
+        HubLabels.build(graph) runs one pruned breadth-first search per
+        person, highest co-star count first, and returns the labels. If
+        `progress` is a file, a line is written to it every PROGRESS seconds.
+        """
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+        people = len(person_offsets) - 1
+        movie_count = len(movie_offsets) - 1
+
+        # Well connected people make the best hubs, so they go first
+        def costars(p):
+            return sum(
+                movie_offsets[m + 1] - movie_offsets[m]
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]
+            )
+        order = array("i", sorted(range(people), key=costars, reverse=True))
+        ranks = array("i", [0]) * people
+        for rank, p in enumerate(order):
+            ranks[p] = rank
+
+        # Labels still growing, by person. A label is complete once its
+        # person has been a root, since every later search is pruned
+        # there, so it is then appended to the flat arrays and dropped
+        label_hubs = [array("i") for _ in range(people)]
+        label_distances = [array("B") for _ in range(people)]
+        label_parents = [array("i") for _ in range(people)]
+        label_movies = [array("i") for _ in range(people)]
+        offsets = array("q", [0])
+        hubs, distances, parents, movies = array("i"), array("B"), array("i"), array("i")
+
+        depth = array("i", [-1]) * people
+        seen_movies = bytearray(movie_count)
+        root_distance = array("i", [INFINITY]) * people
+        start = reported = time.perf_counter()
+
+        for rank, root in enumerate(order):
+
+            # Distances from root to its own hubs, for pruning queries
+            for h, d in zip(label_hubs[root], label_distances[root]):
+                root_distance[h] = d
+
+            depth[root] = 0
+            visited = [root]
+            touched_movies = []
+            layer = [(root, -1, -1)]
+            d = 0
+            while layer:
+                next_layer = []
+                for p, parent, movie in layer:
+
+                    # Prune people the existing labels already cover,
+                    # which includes everyone who has been a root
+                    if ranks[p] < rank:
+                        continue
+                    covered = False
+                    for h, hd in zip(label_hubs[p], label_distances[p]):
+                        if root_distance[h] + hd <= d:
+                            covered = True
+                            break
+                    if covered:
+                        continue
+
+                    label_hubs[p].append(rank)
+                    label_distances[p].append(d)
+                    label_parents[p].append(parent)
+                    label_movies[p].append(movie)
+
+                    for i in range(person_offsets[p], person_offsets[p + 1]):
+                        m = person_movies[i]
+                        if seen_movies[m]:
+                            continue
+                        seen_movies[m] = 1
+                        touched_movies.append(m)
+                        for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                            q = movie_stars[j]
+                            if depth[q] < 0:
+                                depth[q] = d + 1
+                                visited.append(q)
+                                next_layer.append((q, p, m))
+                layer = next_layer
+                d += 1
+
+            # Reset scratch state for the next root
+            for p in visited:
+                depth[p] = -1
+            for m in touched_movies:
+                seen_movies[m] = 0
+            for h in label_hubs[root]:
+                root_distance[h] = INFINITY
+
+            # Nothing more will be added to the root's label
+            hubs.extend(label_hubs[root])
+            distances.extend(label_distances[root])
+            parents.extend(label_parents[root])
+            movies.extend(label_movies[root])
+            offsets.append(len(hubs))
+            label_hubs[root] = label_distances[root] = None
+            label_parents[root] = label_movies[root] = None
+
+            now = time.perf_counter()
+            if progress is not None and now - reported >= PROGRESS:
+                reported = now
+                print(f"{rank + 1} of {people} roots in {now - start:.0f} s "
+                      f"({len(hubs) / (rank + 1):.1f} hubs per person so far).",
+                      file=progress, flush=True)
+
+        return cls(order, ranks, offsets, hubs, distances, parents, movies)
+
+    def save(self, path, directory):
+        """
+        Write the labels to `path`, recording the CSVs in `directory`
+        they were built from.
+        """
+        sections = {}
+        for name, typecode in SECTIONS:
+            data = getattr(self, name)
+            sections[name] = data if isinstance(data, array) else array(typecode, data)
+        write_sections(path, MAGIC, {"sources": source_stats(directory)}, sections)
+
+    @classmethod
+    def load(cls, path, directory):
+        """
+        HubLabels.load(path, directory) maps saved labels, or returns None
+        if there are none or the CSVs in `directory` have changed since.
+        """
+        mapped = map_sections(path, MAGIC)
+        if mapped is None:
+            return None
+        header, section = mapped
+        if header["sources"] != source_stats(directory):
+            return None
+        return cls(*(section(name) for name, _ in SECTIONS))
+
+    def meet(self, s, t):
+        """
+        Return (distance, hub rank) for the shortest route between person
+        indices `s` and `t` through a common hub, or (None, None).
+        """
+        hubs, distances = self.hubs, self.distances
+        s, t = self.ranks[s], self.ranks[t]
+        i, i_end = self.offsets[s], self.offsets[s + 1]
+        j, j_end = self.offsets[t], self.offsets[t + 1]
+        best, best_hub = INFINITY, None
+        while i < i_end and j < j_end:
+            a, b = hubs[i], hubs[j]
+            if a == b:
+                d = distances[i] + distances[j]
+                if d < best:
+                    best, best_hub = d, a
+                i += 1
+                j += 1
+            elif a < b:
+                i += 1
+            else:
+                j += 1
+        if best_hub is None:
+            return None, None
+        return best, best_hub
+
+    def distance(self, s, t):
+        """
+        Return the number of degrees between person indices `s` and `t`,
+        or None if they are not connected.
+        """
+        return self.meet(s, t)[0]
+
+    def entry(self, p, hub):
+        """
+        Return the position of `hub` in the label of person index `p`.
+        """
+        r = self.ranks[p]
+        lo, hi = self.offsets[r], self.offsets[r + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.hubs[mid] < hub:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def towards(self, p, hub):
+        """
+        Return the (movie, person) steps from person index `p` to `hub`.
+        """
+        steps = []
+        while True:
+            i = self.entry(p, hub)
+            if self.parents[i] < 0:
+                return steps
+            steps.append((self.movies[i], self.parents[i]))
+            p = self.parents[i]
+
+    def path_between(self, s, t):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect person index `s` to `t`, or None.
+        """
+        distance, hub = self.meet(s, t)
+        if distance is None:
+            return None
+
+        path = self.towards(s, hub)
+
+        # Walk back from the target to the hub, then reverse that half
+        back = self.towards(t, hub)
+        people = [t] + [p for _, p in back]
+        for i in range(len(back) - 1, -1, -1):
+            path.append((back[i][0], people[i]))
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python labels.py build|query [--index PATH] [--cache PATH] "
+              "directory [source target]"
+    )
+    parser.add_argument("command", choices=["build", "query"])
+    parser.add_argument("directory")
+    parser.add_argument("people", nargs="*")
+    parser.add_argument("--index")
+    parser.add_argument("--cache")
+    args = parser.parse_args()
+    index = args.index or os.path.join(args.directory, "degrees.labels")
+    cache = args.cache or default_path(args.directory)
+
+    print("Loading data...")
+    graph = load_snapshot(args.directory, cache) or Graph.from_csv(args.directory)
+    print("Data loaded.")
+
+    if args.command == "build":
+        start = time.perf_counter()
+        labels = HubLabels.build(graph, progress=sys.stdout)
+        labels.save(index, args.directory)
+        elapsed = time.perf_counter() - start
+        people = len(labels.offsets) - 1
+        print(f"Index written to {index} in {elapsed:.2f} s "
+              f"({len(labels.hubs) / max(people, 1):.1f} hubs per person).")
+        peak = peak_memory()
+        if peak is not None:
+            print(f"Peak memory {peak:.1f} MiB.")
+        return
+
+    if len(args.people) != 2:
+        sys.exit("Usage: python labels.py query directory source target")
+    labels = HubLabels.load(index, args.directory)
+    if labels is None:
+        sys.exit("Index missing or out of date, run: python labels.py build directory")
+
+    source, target = (find_person(graph, value) for value in args.people)
+    if source is None or target is None:
+        sys.exit("Person not found.")
+
+    start = time.perf_counter()
+    distance = labels.distance(source, target)
+    middle = time.perf_counter()
+    path = labels.path_between(source, target)
+    end = time.perf_counter()
+    print(f"Distance took {(middle - start) * 1e6:.1f} us, "
+          f"path took {(end - middle) * 1e6:.1f} us.")
+
+    if distance is None:
+        print("Not connected.")
+        return
+    print(f"{distance} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(distance):
+        person1 = graph.person_names[path[i][1]]
+        person2 = graph.person_names[path[i + 1][1]]
+        movie = graph.movie_titles[path[i + 1][0]]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def find_person(graph, value):
+    """
+    Return the person index for a person ID or unambiguous name, or None.
+    """
+    if value in graph.person_lookup:
+        return graph.person_lookup[value]
+    matches = graph.name_lookup.get(value.lower(), [])
+    return matches[0] if len(matches) == 1 else None
+
+
+if __name__ == "__main__":
+    main()
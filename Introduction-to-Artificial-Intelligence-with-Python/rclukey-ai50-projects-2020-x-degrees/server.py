@@ -0,0 +1,215 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from snapshot import default_path
+
+# Number of (source, target) results kept by default
+CACHE_SIZE = 10000
+
+# Number of recent request latencies kept for percentiles
+WINDOW = 10000
+
+
+class ResultCache():
+    """
+    Thread-safe least recently used cache of path results
+    keyed by (source, target).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class Metrics():
+    """
+    Request counts and a window of recent latencies per endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.latencies = {}
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            window = self.latencies.setdefault(endpoint, [])
+            window.append(seconds)
+            if len(window) > WINDOW:
+                del window[:len(window) - WINDOW]
+
+    def summary(self):
+        """
+        Return request counts and latency percentiles in milliseconds.
+        """
+        with self.lock:
+            summary = {}
+            for endpoint, window in self.latencies.items():
+                ordered = sorted(window)
+                summary[endpoint] = {
+                    "requests": self.counts[endpoint],
+                    "p50_ms": percentile(ordered, 50) * 1000,
+                    "p90_ms": percentile(ordered, 90) * 1000,
+                    "p99_ms": percentile(ordered, 99) * 1000,
+                    "max_ms": ordered[-1] * 1000
+                }
+            return summary
+
+
+def percentile(ordered, p):
+    """
+    Return the `p`th percentile of a sorted, non-empty list.
+    """
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers /path?source=&target=, /metrics and /health with JSON.
+    """
+
+    cache = None
+    metrics = None
+    engine = "bidirectional"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        known = True
+        if url.path == "/path":
+            status, body = self.path_query(query)
+        elif url.path == "/metrics":
+            status, body = 200, {
+                "endpoints": self.metrics.summary(),
+                "cache": {
+                    "entries": len(self.cache.entries),
+                    "hits": self.cache.hits,
+                    "misses": self.cache.misses
+                }
+            }
+        elif url.path == "/health":
+            status, body = 200, {"status": "ok"}
+        else:
+            known = False
+            status, body = 404, {"error": "not found"}
+
+        elapsed = time.perf_counter() - start
+        if known:
+            self.metrics.record(url.path, elapsed)
+        if url.path == "/path":
+            body["elapsed_ms"] = elapsed * 1000
+        self.send_json(status, body)
+
+    def path_query(self, query):
+        """
+        Return the status and body for a /path request.
+        """
+        if "source" not in query or "target" not in query:
+            return 400, {"error": "source and target are required"}
+        sources = degrees.resolve_person(query["source"])
+        targets = degrees.resolve_person(query["target"])
+        for role, person_ids in (("source", sources), ("target", targets)):
+            error = degrees.resolve_error(role, person_ids)
+            if error is not None:
+                # A shared name is a request to narrow down, not a miss
+                return (404 if not person_ids else 400), error
+        source, target = sources[0], targets[0]
+
+        hit, path = self.cache.get((source, target))
+        if not hit:
+            if self.engine == "bidirectional":
+                path = degrees.bidirectional_shortest_path(source, target)
+            else:
+                path = degrees.shortest_path(source, target)
+            self.cache.put((source, target), path)
+
+        return 200, {
+            "source_id": source,
+            "target_id": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "cached": hit
+        }
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Latency is tracked in /metrics rather than logged per request
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [--host HOST] [--port PORT] [--cache-size N] "
+              "[--engine {bfs,bidirectional}] [--compact] [--cache PATH] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    parser.add_argument("--engine", choices=degrees.ENGINES, default="bidirectional")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--cache")
+    args = parser.parse_args()
+
+    # Load the graph once for the lifetime of the server
+    print("Loading data...")
+    if degrees.load_cached_data(args.directory, args.cache or default_path(args.directory)):
+        print("Data mapped from cache.")
+    elif args.compact:
+        degrees.load_compact_data(args.directory)
+        print("Data loaded.")
+    else:
+        degrees.load_data(args.directory)
+        print("Data loaded.")
+
+    Handler.cache = ResultCache(args.cache_size)
+    Handler.metrics = Metrics()
+    Handler.engine = args.engine
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{args.port}/path?source=&target=")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP1"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Integer arrays stored as-is in the snapshot
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+
+# String tables stored as a UTF-8 blob plus an offsets array
+TABLES = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+]
+
+
+class StringTable():
+    """
+    Read-only list of strings decoded on demand from a UTF-8 blob.
+    The string at index `i` is `blob[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+        self.nbytes = len(blob) + len(offsets) * offsets.itemsize
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedLookup():
+    """
+    Read-only mapping from string keys to indices, backed by an array of
+    indices sorted by `key(index)` and searched by bisection.
+
+    With `multiple`, lookups return the list of every matching index.
+    """
+
+    def __init__(self, order, key, multiple=False):
+        self.order = order
+        self.key = key
+        self.multiple = multiple
+        self.nbytes = len(order) * order.itemsize
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, k):
+        return self.get(k) is not None
+
+    def __getitem__(self, k):
+        value = self.get(k)
+        if value is None:
+            raise KeyError(k)
+        return value
+
+    def get(self, k, default=None):
+        # Find the first position whose key is not less than k
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(self.order[mid]) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        matches = []
+        while lo < len(self.order) and self.key(self.order[lo]) == k:
+            matches.append(self.order[lo])
+            if not self.multiple:
+                return matches[0]
+            lo += 1
+        return matches if matches else default
+
+
+def source_stats(directory):
+    """
+    Return the modification time and size of each CSV in `directory`,
+    used to tell whether a snapshot is still current.
+    """
+    stats = {}
+    for filename in SOURCES:
+        st = os.stat(os.path.join(directory, filename))
+        stats[filename] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def default_path(directory):
+    """
+    Return where the snapshot for `directory` lives by default.
+    """
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def write_snapshot(graph, directory, path):
+    """
+    Write `graph`, loaded from the CSVs in `directory`, to a binary
+    snapshot at `path`.
+    """
+    sections = {}
+    for name in ARRAYS:
+        sections[name] = array("i", getattr(graph, name))
+    for name in TABLES:
+        blob = bytearray()
+        offsets = array("q", [0])
+        for s in getattr(graph, name):
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        sections[f"{name}.blob"] = blob
+        sections[f"{name}.offsets"] = offsets
+
+    # Sorted orders let lookups bisect the mapped tables without a dict
+    sections["person_order"] = array(
+        "i", sorted(range(len(graph.person_ids)), key=graph.person_ids.__getitem__)
+    )
+    sections["movie_order"] = array(
+        "i", sorted(range(len(graph.movie_ids)), key=graph.movie_ids.__getitem__)
+    )
+    sections["name_order"] = array(
+        "i", sorted(range(len(graph.person_names)), key=lambda p: graph.person_names[p].lower())
+    )
+
+    write_sections(path, MAGIC, {"sources": source_stats(directory)}, sections)
+
+
+def write_sections(path, magic, header, sections):
+    """
+    Write `sections`, a dictionary of arrays and bytearrays, to `path`
+    after `magic` and a JSON `header` describing where each one lives.
+    Every section starts on an 8 byte boundary so it can be mapped in place.
+    """
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout[name] = [position, size, typecode]
+        position += size + (-size % 8)
+
+    header = json.dumps(
+        dict(header, byteorder=sys.byteorder, sections=layout)
+    ).encode("utf-8")
+    header += b" " * (-(len(magic) + 8 + len(header)) % 8)
+    base = len(magic) + 8 + len(header)
+
+    with open(path, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            offset, size, _ = layout[name]
+            f.seek(base + offset)
+            f.write(data)
+        f.truncate(base + position)
+
+
+def map_sections(path, magic):
+    """
+    Memory-map a file written by write_sections and return its header
+    and a function from section name to a memoryview of that section.
+
+    Returns None if there is no such file or it was written with a
+    different magic or byte order.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        if f.read(len(magic)) != magic:
+            return None
+        length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+        if header["byteorder"] != sys.byteorder:
+            return None
+        base = len(magic) + 8 + length
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def section(name):
+        offset, size, typecode = header["sections"][name]
+        return buffer[base + offset:base + offset + size].cast(typecode)
+
+    return header, section
+
+
+def load_snapshot(directory, path):
+    """
+    Memory-map the snapshot at `path` and return it as a Graph.
+
+    Returns None if there is no snapshot, or if the CSVs in `directory`
+    have changed since it was written.
+    """
+    mapped = map_sections(path, MAGIC)
+    if mapped is None:
+        return None
+    header, section = mapped
+    if header["sources"] != source_stats(directory):
+        return None
+
+    tables = {
+        name: StringTable(section(f"{name}.blob"), section(f"{name}.offsets"))
+        for name in TABLES
+    }
+    person_ids, person_names = tables["person_ids"], tables["person_names"]
+    movie_ids = tables["movie_ids"]
+
+    return Graph(
+        person_ids, person_names, tables["person_births"],
+        movie_ids, tables["movie_titles"], tables["movie_years"],
+        *(section(name) for name in ARRAYS),
+        SortedLookup(section("person_order"), person_ids.__getitem__),
+        SortedLookup(section("movie_order"), movie_ids.__getitem__),
+        SortedLookup(section("name_order"), lambda p: person_names[p].lower(), multiple=True)
+    )
@@ -1,3 +1,14 @@
+import csv
+import sys
+import threading
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+
+# Number of CSV rows handed to a loader at a time
+CHUNK_SIZE = 10000
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +47,105 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    def __init__(self):
+        self.frontier = deque()
+        # Maps each state to how many nodes in the frontier hold it
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def forget(self, node):
+        count = self.states[node.state] - 1
+        if count == 0:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.forget(node)
+            return node
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.forget(node)
+            return node
+
+
+def read_chunks(path, columns, size=CHUNK_SIZE):
+    """
+    Yield lists of up to `size` rows from the CSV at `path`, each row a
+    tuple of the values in `columns`, picked out by position.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        getter = itemgetter(*(header.index(column) for column in columns))
+        while True:
+            chunk = list(map(getter, islice(reader, size)))
+            if not chunk:
+                return
+            yield chunk
+
+
+class BackgroundReader():
+    """
+    Reads the chunks of a CSV on a worker thread. Iterating waits for the
+    thread to finish, then yields the chunks it read, or raises the
+    exception that stopped it.
+    """
+
+    def __init__(self, path, columns):
+        self.chunks = []
+        self.error = None
+        self.thread = threading.Thread(target=self.read, args=(path, columns), daemon=True)
+        self.thread.start()
+
+    def read(self, path, columns):
+        try:
+            self.chunks.extend(read_chunks(path, columns))
+        except BaseException as e:
+            self.error = e
+
+    def __iter__(self):
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return iter(self.chunks)
+
+
+def peak_memory():
+    """
+    Returns the peak resident set size of this process in MiB, or None
+    where the platform does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / 2 ** 20
+    return peak / 2 ** 10
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import pagerank
+from edgefile import out_of_core_pagerank, write_edge_file
+from matrix import matrix_pagerank
+from pagerank import DAMPING, SAMPLES
+from sampling import batch_sample_pagerank, fast_sample_pagerank
+from solvers import solve
+
+SIZES = [100, 1000, 10000, 100000, 1000000]
+GRAPHS = ["erdos-renyi", "barabasi-albert", "dangling"]
+
+# Mean number of links per page in generated corpora
+MEAN_LINKS = 5
+
+# Share of pages without links in dangling-heavy corpora
+DANGLING_FRACTION = 0.5
+
+# Tolerance of the reference ranks every engine is compared against
+REFERENCE_TOLERANCE = 1e-10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark_pagerank.py [--sizes N ...] [--graphs NAME ...] "
+              "[--engines NAME ...] [--repeat R] [--seed S] [--output PATH]"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--graphs", choices=GRAPHS, nargs="+", default=GRAPHS)
+    parser.add_argument("--engines", choices=list(ENGINES), nargs="+", default=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="pagerank-benchmark.json")
+    args = parser.parse_args()
+
+    results = []
+    for graph in args.graphs:
+        for size in args.sizes:
+            corpus = generate(graph, size, args.seed)
+            links = sum(len(corpus[page]) for page in corpus)
+            reference = matrix_pagerank(corpus, DAMPING, REFERENCE_TOLERANCE)
+            print(f"{graph}, {size} pages, {links} links")
+
+            for engine in args.engines:
+                result = {"graph": graph, "pages": size, "links": links, "engine": engine}
+                if size > ENGINES[engine][1]:
+                    result["skipped"] = True
+                    print(f"  {engine}: skipped above {ENGINES[engine][1]} pages")
+                else:
+                    result.update(run_engine(engine, corpus, reference, args.repeat))
+                    print(f"  {engine}: {result['best_seconds'] * 1000:.1f} ms, "
+                          f"L1 error {result['error']:.2e}")
+                results.append(result)
+            del corpus, reference
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "damping": DAMPING,
+            "repeat": args.repeat,
+            "results": results
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def erdos_renyi(n, seed, mean_links=MEAN_LINKS):
+    """
+    Return a corpus of `n` pages where every possible link is present
+    independently, with `mean_links` links per page on average.
+    """
+    rng = np.random.default_rng(seed)
+    pages = [f"{i}.html" for i in range(n)]
+    counts = rng.binomial(n - 1, min(1, mean_links / max(1, n - 1)), size=n)
+    return random_links(pages, counts, rng)
+
+
+def barabasi_albert(n, seed, mean_links=MEAN_LINKS):
+    """
+    Return a corpus of `n` pages grown by preferential attachment: each
+    new page links to `mean_links` earlier pages, chosen in proportion
+    to the links they already receive plus one, giving power-law
+    in-degrees.
+    """
+    rng = random.Random(seed)
+    pages = [f"{i}.html" for i in range(n)]
+    corpus = {page: set() for page in pages}
+
+    # Every page appears once, plus once per link it receives
+    pool = []
+    for i in range(n):
+        targets = set()
+        while pool and len(targets) < min(mean_links, i):
+            targets.add(pool[int(rng.random() * len(pool))])
+        corpus[pages[i]] = {pages[target] for target in targets}
+        pool.extend(targets)
+        pool.append(i)
+    return corpus
+
+
+def dangling_heavy(n, seed, mean_links=MEAN_LINKS, fraction=DANGLING_FRACTION):
+    """
+    Return an Erdős–Rényi style corpus of `n` pages where a `fraction`
+    of the pages have no links at all.
+    """
+    rng = np.random.default_rng(seed)
+    pages = [f"{i}.html" for i in range(n)]
+    counts = rng.binomial(n - 1, min(1, mean_links / max(1, n - 1)), size=n)
+    counts[rng.random(n) < fraction] = 0
+    return random_links(pages, counts, rng)
+
+
+def random_links(pages, counts, rng):
+    """
+    Return a corpus where page `i` links to `counts[i]` other pages
+    chosen uniformly at random.
+    """
+    n = len(pages)
+    corpus = {}
+    targets = rng.integers(max(1, n - 1), size=int(counts.sum()))
+    start = 0
+    for i, page in enumerate(pages):
+        chosen = targets[start:start + counts[i]]
+        start += counts[i]
+
+        # Shift targets past the page itself so pages never link to themselves
+        corpus[page] = {pages[t + (t >= i)] for t in chosen.tolist()}
+    return corpus
+
+
+GENERATORS = {
+    "erdos-renyi": erdos_renyi,
+    "barabasi-albert": barabasi_albert,
+    "dangling": dangling_heavy
+}
+
+
+def generate(graph, n, seed):
+    """
+    Return the corpus of `n` pages generated by `graph`.
+    """
+    return GENERATORS[graph](n, seed)
+
+
+def run_engine(engine, corpus, reference, repeat):
+    """
+    Time `engine` on `corpus` `repeat` times and compare its ranks with
+    `reference`. Return a dictionary of the timings and the L1 error.
+    """
+    run = ENGINES[engine][0]
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ranks = run(corpus)
+        seconds.append(time.perf_counter() - start)
+    error = sum(abs(ranks[page] - reference[page]) for page in corpus)
+    return {"seconds": seconds, "best_seconds": min(seconds), "error": error}
+
+
+def run_out_of_core(corpus):
+    """
+    Run out_of_core_pagerank, including writing the corpus's edge file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.edges")
+        write_edge_file(corpus, path)
+        ranks, _ = out_of_core_pagerank(path, DAMPING)
+    return ranks
+
+
+# Each engine, and the largest corpus it is run on; the original
+# iterate_pagerank takes time quadratic in the number of pages
+ENGINES = {
+    "sample": (lambda corpus: pagerank.sample_pagerank(corpus, DAMPING, SAMPLES), 1000000),
+    "iterate": (lambda corpus: pagerank.iterate_pagerank(corpus, DAMPING), 1000),
+    "fast-sample": (lambda corpus: fast_sample_pagerank(corpus, DAMPING, SAMPLES), 1000000),
+    "batch-sample": (lambda corpus: batch_sample_pagerank(corpus, DAMPING, SAMPLES, seed=0), 1000000),
+    "matrix": (lambda corpus: matrix_pagerank(corpus, DAMPING), 1000000),
+    "quadratic": (lambda corpus: solve(corpus, DAMPING, "quadratic")["ranks"], 1000000),
+    "out-of-core": (run_out_of_core, 1000000)
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import os
+import re
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from pagerank import crawl
+
+# The link pattern of pagerank.crawl, matched against raw bytes so that
+# only the links themselves are decoded
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from a page at a time
+BLOCK_SIZE = 1 << 16
+
+# Pages handed to a worker per task, and tasks allowed in flight
+BATCH_SIZE = 64
+BUFFER = 32
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python crawler.py [--workers N] [--threads] corpus"
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", action="store_true")
+    args = parser.parse_args()
+
+    # Benchmark the original crawler against the parallel one
+    start = time.perf_counter()
+    corpus = crawl(args.corpus)
+    elapsed = time.perf_counter() - start
+    print(f"crawl(): {len(corpus)} pages in {elapsed:.2f} s "
+          f"({len(corpus) / elapsed:.0f} pages/s)")
+
+    start = time.perf_counter()
+    pages, sources, targets = parallel_crawl(args.corpus, args.workers, args.threads)
+    elapsed = time.perf_counter() - start
+    kind = "threads" if args.threads else "processes"
+    print(f"parallel_crawl() with {args.workers} {kind}: {len(pages)} pages, "
+          f"{len(sources)} links in {elapsed:.2f} s ({len(pages) / elapsed:.0f} pages/s)")
+
+
+def extract_links(path):
+    """
+    Return the set of link targets in the HTML file at `path`, reading
+    it a block at a time rather than all at once.
+    """
+    links = set()
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            text = carry + block
+
+            # A tag may straddle the block boundary, so hold back
+            # everything from the last "<" until the next block arrives
+            cut = text.rfind(b"<") if len(block) == BLOCK_SIZE else -1
+            if cut < 0:
+                cut = len(text)
+            links.update(LINK.findall(text, 0, cut))
+            carry = text[cut:]
+    links.update(LINK.findall(carry))
+    return {link.decode() for link in links}
+
+
+# Corpus directory and page index shared with workers by init_worker
+shared = None
+
+
+def init_worker(directory, index):
+    """
+    Keep the corpus directory and page index in this worker.
+    """
+    global shared
+    shared = (directory, index)
+
+
+def extract_batch(filenames):
+    """
+    Return (sources, targets) edge arrays for the links in a batch of
+    pages, keeping only links to other pages in the corpus.
+    """
+    directory, index = shared
+    sources, targets = array("i"), array("i")
+    for filename in filenames:
+        source = index[filename]
+        links = extract_links(os.path.join(directory, filename))
+        for link in links:
+            target = index.get(link)
+            if target is not None and target != source:
+                sources.append(source)
+                targets.append(target)
+    return sources, targets
+
+
+def parallel_crawl(directory, workers=None, threads=False):
+    """
+    Parse every HTML page in `directory` across a pool of `workers`
+    processes, or threads with `threads`, keeping at most BUFFER batches
+    of results waiting at once.
+
+    Return a tuple (pages, sources, targets) where `pages` is the sorted
+    list of page names and page `pages[sources[i]]` links to page
+    `pages[targets[i]]`. Only links to other pages in the corpus are kept.
+    """
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    index = {page: i for i, page in enumerate(pages)}
+    batches = iter([pages[i:i + BATCH_SIZE] for i in range(0, len(pages), BATCH_SIZE)])
+
+    sources, targets = array("i"), array("i")
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(workers, initializer=init_worker, initargs=(directory, index)) as pool:
+        pending = set()
+        while True:
+
+            # Top up the window of in-flight batches
+            while len(pending) < BUFFER:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                pending.add(pool.submit(extract_batch, batch))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_sources, batch_targets = future.result()
+                sources.extend(batch_sources)
+                targets.extend(batch_targets)
+
+    return pages, sources, targets
+
+
+def edges_to_corpus(pages, sources, targets):
+    """
+    Return the `crawl()` dictionary for an edge list from parallel_crawl.
+    """
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+    return corpus
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from matrix import MAX_ITERATIONS, TOLERANCE
+from pagerank import DAMPING, crawl
+
+# Edge files start with MAGIC, then the number of pages and of edges
+MAGIC = b"PREDGES1"
+HEADER = struct.Struct("<8sqq")
+
+# Edges read from (or buffered for) the edge file at a time
+BLOCK_EDGES = 1 << 20
+
+# Page names are kept next to the edge file, one per line
+PAGES_SUFFIX = ".pages"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python edgefile.py [--edges PATH] [--block N] corpus"
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--edges")
+    parser.add_argument("--block", type=int, default=BLOCK_EDGES)
+    args = parser.parse_args()
+    path = args.edges or os.path.join(args.corpus, "corpus.edges")
+
+    start = time.perf_counter()
+    corpus = crawl(args.corpus)
+    write_edge_file(corpus, path)
+    del corpus
+    print(f"Wrote {path} in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    ranks, iterations = out_of_core_pagerank(path, DAMPING, block_edges=args.block)
+    elapsed = time.perf_counter() - start
+    print(f"PageRank Results from Out-of-Core Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    peak = peak_memory()
+    if peak is None:
+        print(f"{iterations} iterations in {elapsed:.2f} s")
+    else:
+        print(f"{iterations} iterations in {elapsed:.2f} s, peak memory {peak:.1f} MiB")
+
+
+def peak_memory():
+    """
+    Return the peak resident set size of this process in MiB, or None
+    where the platform does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+def write_edge_file(corpus, path):
+    """
+    Write a `crawl()` corpus to `path` as a binary edge file: a header,
+    the number of links on each page as int32, then (source, target)
+    int32 pairs of page indices sorted by source. Page names, in index
+    order, go to `path` + PAGES_SUFFIX.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    degrees = array("i", (len(corpus[page]) for page in pages))
+
+    with open(path + PAGES_SUFFIX, "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(pages), sum(degrees)))
+        degrees.tofile(f)
+        f.write(b"\0" * (-f.tell() % 8))
+
+        # Buffer edges a block at a time rather than all at once
+        edges = array("i")
+        for source, page in enumerate(pages):
+            for target in sorted(index[link] for link in corpus[page]):
+                edges.append(source)
+                edges.append(target)
+            if len(edges) >= 2 * BLOCK_EDGES:
+                edges.tofile(f)
+                del edges[:]
+        edges.tofile(f)
+
+
+def open_edge_file(path):
+    """
+    Map the edge file at `path` without reading its edges into memory.
+    Return a tuple (pages, degrees, edges) where `edges` is an E x 2
+    memory-mapped array of (source, target) pairs.
+    """
+    with open(path, "rb") as f:
+        magic, n, e = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a PageRank edge file")
+
+    with open(path + PAGES_SUFFIX, encoding="utf-8") as f:
+        pages = f.read().splitlines()
+    if len(pages) != n:
+        raise ValueError(f"{path + PAGES_SUFFIX} does not match {path}")
+
+    degrees = np.fromfile(path, dtype=np.int32, count=n, offset=HEADER.size)
+    offset = HEADER.size + 4 * n
+    offset += -offset % 8
+    if e == 0:
+        edges = np.empty((0, 2), dtype=np.int32)
+    else:
+        edges = np.memmap(path, dtype=np.int32, mode="r", offset=offset, shape=(e, 2))
+    return pages, degrees, edges
+
+
+def out_of_core_pagerank(path, damping_factor, tolerance=TOLERANCE,
+                         block_edges=BLOCK_EDGES, max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for the edge file at `path`, streaming its
+    edges in blocks of `block_edges` every iteration so that only arrays
+    of one value per page stay in memory. Rank on pages without links is
+    spread over every page, as in matrix_pagerank.
+
+    Return a tuple (ranks, iterations) where `ranks` maps page names to
+    PageRank values.
+    """
+    pages, degrees, edges = open_edge_file(path)
+    n = len(pages)
+    dangling = degrees == 0
+    scale = np.zeros(n)
+    scale[~dangling] = 1 / degrees[~dangling]
+
+    ranks = np.full(n, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+
+        # Each page passes rank / degree along each of its links
+        share = ranks * scale
+        following = np.zeros(n)
+        for start in range(0, len(edges), block_edges):
+            block = np.asarray(edges[start:start + block_edges])
+            following += np.bincount(block[:, 1], weights=share[block[:, 0]], minlength=n)
+        following += ranks[dangling].sum() / n
+        new_ranks = (1 - damping_factor) / n + damping_factor * following
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+    return dict(zip(pages, ranks.tolist())), iteration
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from bisect import bisect_left
+
+import numpy as np
+from scipy import sparse
+
+from crawler import extract_links
+from matrix import TOLERANCE, build_matrix, power_iteration
+from pagerank import DAMPING
+
+# State is a directory of sections, each rewritten only when it changes
+STATE = ".pagerank-state"
+PAGES = "pages.npz"
+MATRIX = "matrix.npz"
+OUTSIDE = "outside.json"
+RANKS = "ranks.npz"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python incremental.py [--state PATH] [--cold] corpus"
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--state")
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+    state_path = args.state or os.path.join(args.corpus, STATE)
+    if args.cold and os.path.exists(state_path):
+        shutil.rmtree(state_path)
+
+    start = time.perf_counter()
+    ranks, stats = incremental_pagerank(args.corpus, DAMPING, state_path)
+    elapsed = time.perf_counter() - start
+
+    print(f"PageRank Results from Incremental Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    print(f"{stats['pages']} pages, {stats['parsed']} parsed, "
+          f"{stats['removed']} removed, {stats['iterations']} iterations "
+          f"({'warm' if stats['warm'] else 'cold'} start) in {elapsed:.2f} s")
+
+
+def load_state(path, damping_factor):
+    """
+    Return the state saved in the directory `path`, or an empty state if
+    there is none or its sections do not agree. Ranks computed with a
+    different damping factor are not reused.
+
+    Pages are kept in the order the directory listed them as `scanned`,
+    with matching `mtime_ns` and `size` arrays, and `order` sorts them
+    into `names`, the order of the matrix and ranks. `outside` maps a
+    page to its links to pages that were not in the corpus, so they can
+    be linked up if those pages appear.
+    """
+    state = {
+        "scanned": [],
+        "mtime_ns": np.zeros(0, dtype=np.int64),
+        "size": np.zeros(0, dtype=np.int64),
+        "order": np.zeros(0, dtype=np.int64),
+        "names": [],
+        "matrix": None,
+        "dangling": None,
+        "outside": {},
+        "ranks": None
+    }
+    try:
+        with np.load(os.path.join(path, PAGES)) as f:
+            scanned, mtime_ns, size, order = f["scanned"].tolist(), f["mtime_ns"], f["size"], f["order"]
+        n = len(scanned)
+        with np.load(os.path.join(path, MATRIX)) as f:
+            matrix = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=(n, n))
+            dangling = f["dangling"]
+        with open(os.path.join(path, OUTSIDE), encoding="utf-8") as f:
+            outside = json.load(f)
+        with np.load(os.path.join(path, RANKS)) as f:
+            damping, ranks = float(f["damping"]), f["ranks"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return state
+    if len(order) != n or len(dangling) != n or len(ranks) != n:
+        return state
+
+    state.update(scanned=scanned, mtime_ns=mtime_ns, size=size, order=order,
+                 names=[scanned[i] for i in order], matrix=matrix,
+                 dangling=dangling, outside=outside)
+    if damping == damping_factor:
+        state["ranks"] = ranks
+    return state
+
+
+def save_section(path, name, **arrays):
+    """
+    Write one section of the state as an uncompressed .npz file, replacing
+    the old one only once the new one is complete.
+    """
+    temporary = os.path.join(path, name + ".tmp.npz")
+    np.savez(temporary, **arrays)
+    os.replace(temporary, os.path.join(path, name))
+
+
+def incremental_pagerank(directory, damping_factor, state_path, tolerance=TOLERANCE):
+    """
+    Return PageRank values for the corpus in `directory`, reusing the
+    state saved at `state_path` by the previous run.
+
+    Only pages whose modification time or size changed are parsed again,
+    and iteration starts from the previous ranks rather than uniform.
+    Return a tuple (ranks, stats) and save the new state.
+    """
+    state = load_state(state_path, damping_factor)
+
+    scanned, mtime_ns, size = [], [], []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".html"):
+            st = entry.stat()
+            scanned.append(entry.name)
+            mtime_ns.append(st.st_mtime_ns)
+            size.append(st.st_size)
+    mtime_ns = np.array(mtime_ns, dtype=np.int64)
+    size = np.array(size, dtype=np.int64)
+
+    # Compare modification times and sizes against the saved arrays,
+    # skipping the sort when the directory lists the same pages as before
+    if scanned == state["scanned"]:
+        order = state["order"]
+        at = np.arange(len(scanned))
+    else:
+        order = np.array(sorted(range(len(scanned)), key=scanned.__getitem__), dtype=np.int64)
+        index = {page: i for i, page in enumerate(state["scanned"])}
+        at = np.array([index.get(page, -1) for page in scanned], dtype=np.int64)
+    known = at >= 0
+    stale = ~known
+    stale[known] = ((mtime_ns[known] != state["mtime_ns"][at[known]])
+                    | (size[known] != state["size"][at[known]]))
+    changed = [scanned[i] for i in np.flatnonzero(stale)]
+    removed = len(state["scanned"]) - int(np.count_nonzero(known))
+    names = [scanned[i] for i in order]
+    same_pages = names == state["names"]
+
+    # Re-parse only the pages that changed since the last run, keeping
+    # links to pages outside the corpus aside
+    pageset = set(names)
+    links = {}
+    outside = dict(state["outside"])
+    for page in changed:
+        raw = extract_links(os.path.join(directory, page))
+        links[page] = (raw & pageset) - {page}
+        missing = missing_pages(raw, pageset)
+        if missing:
+            outside[page] = missing
+        else:
+            outside.pop(page, None)
+
+    if state["matrix"] is not None and same_pages:
+        matrix, dangling = patch_matrix(state["matrix"], state["dangling"], names, links)
+    else:
+        corpus = unchanged_links(state, pageset, links, outside)
+        corpus.update(links)
+        _, matrix, dangling = build_matrix(corpus)
+
+    # Warm start from the old ranks, giving new pages an even share
+    warm = state["ranks"] is not None
+    if warm and same_pages:
+        start = state["ranks"]
+    elif warm:
+        position = np.empty(len(state["order"]), dtype=np.int64)
+        position[state["order"]] = np.arange(len(state["order"]))
+        old = at[order]
+        start = np.full(len(names), 1 / len(names))
+        start[old >= 0] = state["ranks"][position[old[old >= 0]]]
+        start /= start.sum()
+    else:
+        start = None
+
+    ranks, iterations = power_iteration(
+        matrix, dangling, damping_factor, tolerance, start=start
+    )
+
+    os.makedirs(state_path, exist_ok=True)
+    if changed or removed or order is not state["order"]:
+        save_section(state_path, PAGES, scanned=np.array(scanned, dtype=str),
+                     mtime_ns=mtime_ns, size=size, order=order)
+    if changed or not same_pages or state["matrix"] is None:
+        save_section(state_path, MATRIX, indptr=matrix.indptr, indices=matrix.indices,
+                     data=matrix.data, dangling=dangling)
+    if outside != state["outside"] or state["matrix"] is None:
+        temporary = os.path.join(state_path, OUTSIDE + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(outside, f)
+        os.replace(temporary, os.path.join(state_path, OUTSIDE))
+    save_section(state_path, RANKS, damping=damping_factor, ranks=ranks)
+
+    stats = {
+        "pages": len(names),
+        "parsed": len(changed),
+        "removed": removed,
+        "iterations": iterations,
+        "warm": warm
+    }
+    return dict(zip(names, ranks.tolist())), stats
+
+
+def unchanged_links(state, pageset, links, outside):
+    """
+    Return the links of every page in `pageset`, reading those not parsed
+    again into `links` back from the columns of the saved matrix and
+    their outside links. Links to pages that have gone are moved to
+    `outside`, so they are linked up again if those pages come back.
+    """
+    corpus = {page: set() for page in pageset}
+    if state["matrix"] is None:
+        return corpus
+
+    previous = state["names"]
+    columns = state["matrix"].tocsc()
+    for i, page in enumerate(previous):
+        if page not in pageset:
+            outside.pop(page, None)
+            continue
+        if page in links:
+            continue
+        raw = {previous[j] for j in columns.indices[columns.indptr[i]:columns.indptr[i + 1]]}
+        raw.update(outside.get(page, ()))
+        corpus[page] = (raw & pageset) - {page}
+        missing = missing_pages(raw, pageset)
+        if missing:
+            outside[page] = missing
+        else:
+            outside.pop(page, None)
+    return corpus
+
+
+def missing_pages(links, pageset):
+    """
+    Return the sorted links that are not pages in `pageset` but could
+    name a page added later, leaving out links to other sites or folders.
+    """
+    return sorted(
+        link for link in links - pageset
+        if link.endswith(".html") and "/" not in link
+    )
+
+
+def patch_matrix(matrix, dangling, names, links):
+    """
+    Return the link matrix and dangling mask with the columns of the pages
+    in `links` rebuilt from their new links, for a corpus whose set of
+    pages is the same.
+    """
+    n = len(names)
+
+    # Clear the changed pages' columns, then add their new links, finding
+    # pages in the sorted names by bisection
+    keep = np.ones(n)
+    rows, cols, data = [], [], []
+    dangling = dangling.copy()
+    for page, targets in links.items():
+        i = bisect_left(names, page)
+        keep[i] = 0
+        dangling[i] = len(targets) == 0
+        for link in targets:
+            rows.append(bisect_left(names, link))
+            cols.append(i)
+            data.append(1 / len(targets))
+
+    update = sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+    matrix = (matrix @ sparse.diags(keep) + update).tocsr()
+    matrix.eliminate_zeros()
+    return matrix, dangling
+
+
+if __name__ == "__main__":
+    main()
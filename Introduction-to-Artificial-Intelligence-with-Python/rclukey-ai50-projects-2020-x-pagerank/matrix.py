@@ -0,0 +1,169 @@
+import sys
+
+import numpy as np
+from scipy import sparse
+
+from pagerank import DAMPING, crawl
+
+# L1 change between iterations below which PageRank has converged
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+# How to treat pages without links: "uniform" spreads their rank over
+# every page, "ignore" drops it as iterate_pagerank does
+DANGLING = ["uniform", "ignore"]
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python matrix.py corpus")
+    corpus = crawl(sys.argv[1])
+    ranks = matrix_pagerank(corpus, DAMPING)
+    print(f"PageRank Results from Sparse Power Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def build_matrix(corpus):
+    """
+    Build the link matrix of a `crawl()` corpus once.
+
+    Return a tuple (pages, matrix, dangling) where `pages` is the sorted
+    list of page names, `matrix` is a CSR matrix whose entry [j, i] is
+    1 / (number of links on page i) if page i links to page j, and
+    `dangling` is a boolean array marking pages with no links.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    rows, cols, data = [], [], []
+    for page in pages:
+        links = corpus[page]
+        for link in links:
+            rows.append(index[link])
+            cols.append(index[page])
+            data.append(1 / len(links))
+
+    n = len(pages)
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(n, n), dtype=np.float64)
+    dangling = np.array([len(corpus[page]) == 0 for page in pages])
+    return pages, matrix, dangling
+
+
+def power_iteration(matrix, dangling, damping_factor, tolerance=TOLERANCE,
+                    dangling_mode="uniform", start=None, max_iterations=MAX_ITERATIONS):
+    """
+    Run PageRank power iteration on a matrix from build_matrix until the
+    L1 change between iterations falls below `tolerance`.
+
+    Return a tuple (ranks, iterations) where `ranks` is an array of
+    PageRank values in the same order as the matrix.
+    """
+    if dangling_mode not in DANGLING:
+        raise ValueError(f"dangling_mode must be one of {DANGLING}")
+
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n) if start is None else np.asarray(start, dtype=np.float64)
+    teleport = (1 - damping_factor) / n
+
+    for iteration in range(1, max_iterations + 1):
+        following = matrix @ ranks
+        if dangling_mode == "uniform":
+            following += ranks[dangling].sum() / n
+        new_ranks = teleport + damping_factor * following
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+    return ranks, iteration
+
+
+def matrix_pagerank(corpus, damping_factor, tolerance=TOLERANCE, dangling_mode="uniform"):
+    """
+    Return PageRank values for each page by power iteration over a
+    sparse transition matrix built once from the corpus.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1).
+    """
+    pages, matrix, dangling = build_matrix(corpus)
+    ranks, _ = power_iteration(matrix, dangling, damping_factor, tolerance, dangling_mode)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def teleport_matrix(pages, personalizations):
+    """
+    Return an N x k array whose columns are the `personalizations`,
+    dictionaries from page name to teleport weight, normalized to sum to 1.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    teleport = np.zeros((len(pages), len(personalizations)))
+    for j, weights in enumerate(personalizations):
+        for page, weight in weights.items():
+            if page not in index:
+                raise ValueError(f"Unknown page in personalization: {page}")
+            teleport[index[page], j] = weight
+        total = teleport[:, j].sum()
+        if total <= 0:
+            raise ValueError("Personalization weights must sum to more than 0")
+        teleport[:, j] /= total
+    return teleport
+
+
+def block_power_iteration(matrix, dangling, damping_factor, teleport,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Run personalized PageRank for every column of the N x k `teleport`
+    array at once, so each iteration is a single sparse-times-dense block
+    multiply. Rank on dangling pages is returned along each column's own
+    teleport vector.
+
+    Return a tuple (ranks, iterations) where `ranks` is N x k.
+    """
+    ranks = teleport.copy()
+    for iteration in range(1, max_iterations + 1):
+        following = matrix @ ranks + teleport * ranks[dangling].sum(axis=0)
+        new_ranks = (1 - damping_factor) * teleport + damping_factor * following
+
+        # Stop once every column has converged
+        change = np.abs(new_ranks - ranks).sum(axis=0).max()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
+
+
+def personalized_pagerank(corpus, damping_factor, personalization, tolerance=TOLERANCE):
+    """
+    Return personalized PageRank values, teleporting according to
+    `personalization`, a dictionary from page name to weight, instead of
+    uniformly. Given a list of such dictionaries, return a list of
+    results, all computed together in one pass.
+    """
+    single = isinstance(personalization, dict)
+    personalizations = [personalization] if single else list(personalization)
+
+    pages, matrix, dangling = build_matrix(corpus)
+    teleport = teleport_matrix(pages, personalizations)
+    ranks, _ = block_power_iteration(matrix, dangling, damping_factor, teleport, tolerance)
+
+    results = [dict(zip(pages, column)) for column in ranks.T.tolist()]
+    return results[0] if single else results
+
+
+def topic_pagerank(corpus, damping_factor, topics, tolerance=TOLERANCE):
+    """
+    Return topic-sensitive PageRank values for `topics`, a dictionary from
+    topic name to the pages on that topic, teleporting uniformly within
+    each topic's pages. Return a dictionary from topic to ranks.
+    """
+    names = list(topics)
+    personalizations = [{page: 1 for page in topics[name]} for name in names]
+    results = personalized_pagerank(corpus, damping_factor, personalizations, tolerance)
+    return dict(zip(names, results))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,14 @@ import os
 import random
 import re
 import sys
+from collections import OrderedDict
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Pages whose transition distributions are kept while sampling
+CACHE_SIZE = 4096
+
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
@@ -47,6 +51,79 @@ def crawl(directory):
     return pages
 
 
+class Transition():
+    """
+    Probability distribution over the next page, stored sparsely: every
+    page in the corpus has probability `base`, and each page in `links`
+    has `bonus` more on top.
+    """
+
+    def __init__(self, base, links, bonus):
+        self.base = base
+        self.links = links
+        self.bonus = bonus
+
+    def probability(self, page):
+        if page in self.links:
+            return self.base + self.bonus
+        return self.base
+
+    def dense(self, corpus):
+        """
+        Return the distribution as a dictionary over every page in `corpus`.
+        """
+        prob_dist = dict.fromkeys(corpus, self.base)
+        for website in self.links:
+            prob_dist[website] += self.bonus
+        return prob_dist
+
+    def sample(self, pages):
+        """
+        Choose the next page from the list of every page in the corpus,
+        without building the whole distribution.
+        """
+        if random.random() < self.base * len(pages):
+            return random.choice(pages)
+        return random.choice(self.links)
+
+
+class TransitionModel():
+    """
+    Sparse transition distributions for the pages of a corpus, built on
+    demand and kept in a least recently used cache of `size` pages.
+    """
+
+    def __init__(self, corpus, damping_factor, size=CACHE_SIZE):
+        self.corpus = corpus
+        self.damping_factor = damping_factor
+        self.pages = list(corpus)
+        self.size = size
+        self.cache = OrderedDict()
+
+    def __getitem__(self, page):
+        if page in self.cache:
+            self.cache.move_to_end(page)
+            return self.cache[page]
+
+        links = self.corpus[page]
+        if len(links) > 0:
+            transition = Transition(
+                (1 - self.damping_factor) / len(self.corpus),
+                tuple(sorted(links)),
+                self.damping_factor / len(links)
+            )
+        else:
+            transition = Transition(1 / len(self.corpus), (), 0)
+
+        self.cache[page] = transition
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return transition
+
+    def dense(self, page):
+        return self[page].dense(self.corpus)
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -56,21 +133,7 @@ def transition_model(corpus, page, damping_factor):
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
     """
-    
-    prob_dist = dict()
-    
-    if len(corpus[page]) > 0:
-        for website in corpus:
-            prob_dist[website] = (1-damping_factor) / len(corpus)
-            if website in corpus[page]:
-                prob_dist[website] += damping_factor / len(corpus[page])
-    
-    else:
-        prob = 1/len(corpus)
-        for website in corpus:
-            prob_dist[website] = prob
-    
-    return prob_dist
+    return TransitionModel(corpus, damping_factor, 1).dense(page)
 
 
 def sample_pagerank(corpus, damping_factor, n):
@@ -91,10 +154,9 @@ def sample_pagerank(corpus, damping_factor, n):
     
     PageRank[sample] += (1/n)
     
+    model = TransitionModel(corpus, damping_factor)
     for i in range(n):
-        dist_model = transition_model(corpus, sample, damping_factor)
-        websites, probability = zip(*dist_model.items())
-        sample = random.choices(websites, weights = probability)[0]
+        sample = model[sample].sample(model.pages)
         
         PageRank[sample] += (1/n)
     
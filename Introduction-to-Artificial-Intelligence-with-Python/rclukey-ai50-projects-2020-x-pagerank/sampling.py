@@ -0,0 +1,186 @@
+import multiprocessing
+import random
+import sys
+
+import numpy as np
+
+from pagerank import DAMPING, SAMPLES, crawl
+
+# Number of independent walkers simulated together in batch mode
+WALKERS = 1000
+
+# Number of independently seeded walks the parallel sampler splits n into
+CHUNKS = 64
+
+# Fewest samples each walker takes, so its uniform random start washes out
+MIN_STEPS = 100
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python sampling.py corpus")
+    corpus = crawl(sys.argv[1])
+    ranks = fast_sample_pagerank(corpus, DAMPING, SAMPLES)
+    print(f"PageRank Results from O(1) Sampling (n = {SAMPLES})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    ranks = batch_sample_pagerank(corpus, DAMPING, SAMPLES)
+    print(f"PageRank Results from Batch Sampling (n = {SAMPLES}, walkers = {WALKERS})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    ranks, variances = parallel_sample_pagerank(corpus, DAMPING, SAMPLES)
+    print(f"PageRank Results from Parallel Sampling (n = {SAMPLES}, chunks = {CHUNKS})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f} (chunk variance {variances[page]:.2e})")
+
+
+def build_walk_tables(corpus):
+    """
+    Precompute the tables a random surfer needs, once per corpus.
+
+    Return a tuple (pages, offsets, links) where `pages` is the sorted
+    list of page names and the links of page `i`, as indices into
+    `pages`, are `links[offsets[i]:offsets[i + 1]]`.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = [0]
+    links = []
+    for page in pages:
+        links.extend(sorted(index[link] for link in corpus[page]))
+        offsets.append(len(links))
+    return pages, offsets, links
+
+
+def fast_sample_pagerank(corpus, damping_factor, n, rng=random):
+    """
+    Return PageRank values for each page by sampling `n` pages,
+    starting with a page at random.
+
+    The transition model is a mix of two uniform choices: with probability
+    `damping_factor` follow one of the page's links, otherwise jump to any
+    page, and pages without links always jump. Sampling the mix directly
+    makes every step O(1) instead of building a distribution over the
+    whole corpus.
+    """
+    pages, offsets, links = build_walk_tables(corpus)
+    total = len(pages)
+    counts = [0] * total
+
+    page = rng.randrange(total)
+    counts[page] += 1
+    for _ in range(n - 1):
+        start, end = offsets[page], offsets[page + 1]
+        if start == end or rng.random() >= damping_factor:
+            page = rng.randrange(total)
+        else:
+            page = links[start + int(rng.random() * (end - start))]
+        counts[page] += 1
+
+    return {page: counts[i] / n for i, page in enumerate(pages)}
+
+
+def batch_sample_pagerank(corpus, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Return PageRank values for each page from `n` samples taken by
+    `walkers` independent random surfers stepped together with NumPy.
+    """
+    pages, offsets, links = build_walk_tables(corpus)
+    rng = np.random.default_rng(seed)
+    counts = walk_counts(offsets, links, damping_factor, n, walkers, rng)
+    return dict(zip(pages, (counts / n).tolist()))
+
+
+def walk_counts(offsets, links, damping_factor, n, walkers, rng):
+    """
+    Take `n` samples with up to `walkers` random surfers stepped together,
+    drawing from the NumPy Generator `rng`, and return the visit count
+    of every page as an array. Every surfer takes at least MIN_STEPS
+    samples when `n` allows.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    links = np.asarray(links, dtype=np.int64)
+    degrees = np.diff(offsets)
+    total = len(degrees)
+
+    walkers = max(1, min(walkers, n // MIN_STEPS))
+    positions = rng.integers(total, size=walkers)
+    counts = np.bincount(positions, minlength=total)
+    taken = walkers
+
+    while taken < n:
+
+        # The last step may only need some of the walkers
+        active = min(walkers, n - taken)
+        current = positions[:active]
+
+        follow = (degrees[current] > 0) & (rng.random(active) < damping_factor)
+        following = current[follow]
+        choice = (rng.random(len(following)) * degrees[following]).astype(np.int64)
+
+        current = rng.integers(total, size=active)
+        current[follow] = links[offsets[following] + choice]
+        positions[:active] = current
+
+        counts += np.bincount(current, minlength=total)
+        taken += active
+
+    return counts
+
+
+# Walk tables shared with worker processes by init_worker
+tables = None
+
+
+def init_worker(offsets, links, damping_factor):
+    """
+    Keep the walk tables in this worker for every chunk it runs.
+    """
+    global tables
+    tables = (offsets, links, damping_factor)
+
+
+def run_chunk(chunk):
+    """
+    Run one chunk of `samples` samples with its own seeded stream.
+    """
+    samples, seed = chunk
+    offsets, links, damping_factor = tables
+    rng = np.random.default_rng(seed)
+    return walk_counts(offsets, links, damping_factor, samples, WALKERS, rng)
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, chunks=CHUNKS,
+                             processes=None, seed=0):
+    """
+    Return PageRank values for each page from `n` samples split into
+    `chunks` independent walks run across a pool of `processes`.
+
+    Each chunk draws from its own stream spawned from `seed`, so results
+    depend only on `seed` and `chunks`, not on how many processes run them.
+    Return a tuple (ranks, variances) where `variances` holds, for each
+    page, the variance of its estimate across the chunks.
+    """
+    pages, offsets, links = build_walk_tables(corpus)
+    chunks = max(1, min(chunks, n))
+    sizes = [n // chunks + (1 if i < n % chunks else 0) for i in range(chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+
+    with multiprocessing.Pool(
+        processes, init_worker, (offsets, links, damping_factor)
+    ) as pool:
+        results = pool.map(run_chunk, zip(sizes, seeds))
+
+    counts = np.array(results, dtype=np.float64)
+    estimates = counts / np.array(sizes, dtype=np.float64)[:, None]
+    ranks = counts.sum(axis=0) / n
+    variances = estimates.var(axis=0, ddof=1) if chunks > 1 else np.zeros(len(pages))
+
+    return (
+        dict(zip(pages, ranks.tolist())),
+        dict(zip(pages, variances.tolist()))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from matrix import MAX_ITERATIONS, TOLERANCE, build_matrix
+from pagerank import DAMPING, crawl
+
+# Iterations between extrapolation steps
+EXTRAPOLATE_EVERY = 10
+
+# Adaptive iteration stops updating a page once its change falls below
+# this fraction of the tolerance, relative to the page's rank, so frozen
+# pages together stay well within the tolerance
+FREEZE = 0.1
+
+# Iterations in a row a page must stay below FREEZE before it is frozen
+STREAK = 3
+
+# Iterations between adaptive updates of every page, frozen or not
+REFRESH = 10
+
+# Fraction of active pages left before the adaptive row slice is rebuilt
+SHRINK = 0.75
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python solvers.py [--solver NAME] [--tolerance T] corpus"
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("--solver", choices=list(SOLVERS), action="append")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    corpus = crawl(args.corpus)
+
+    # Compare every solver unless some were chosen
+    for name in args.solver or SOLVERS:
+        result = solve(corpus, DAMPING, name, args.tolerance)
+        print(f"{name}: {result['iterations']} iterations, "
+              f"final change {result['residuals'][-1]:.2e}, "
+              f"{result['seconds'] * 1000:.1f} ms")
+
+
+def solve(corpus, damping_factor, solver="power", tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS):
+    """
+    Return PageRank values for each page computed with `solver`, one of
+    the names in SOLVERS, along with how the solver got there.
+
+    Return a dictionary with the `ranks` of each page, the number of
+    `iterations`, the L1 change of every iteration in `residuals`, and the
+    wall time in `seconds`, not counting building the matrix.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {list(SOLVERS)}")
+    pages, matrix, dangling = build_matrix(corpus)
+
+    start = time.perf_counter()
+    ranks, residuals = SOLVERS[solver](matrix, dangling, damping_factor, tolerance, max_iterations)
+    seconds = time.perf_counter() - start
+
+    return {
+        "ranks": dict(zip(pages, ranks.tolist())),
+        "iterations": len(residuals),
+        "residuals": residuals,
+        "seconds": seconds
+    }
+
+
+def step(matrix, dangling, damping_factor, ranks):
+    """
+    Return the ranks after one power iteration step, spreading the rank
+    of dangling pages over every page.
+    """
+    n = len(ranks)
+    following = matrix @ ranks + ranks[dangling].sum() / n
+    return (1 - damping_factor) / n + damping_factor * following
+
+
+def power_solver(matrix, dangling, damping_factor, tolerance, max_iterations):
+    """
+    Plain (Jacobi) power iteration, the baseline the others improve on.
+    Return a tuple (ranks, residuals).
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for _ in range(max_iterations):
+        new_ranks = step(matrix, dangling, damping_factor, ranks)
+        residuals.append(float(np.abs(new_ranks - ranks).sum()))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def gauss_seidel_solver(matrix, dangling, damping_factor, tolerance, max_iterations):
+    """
+    Gauss-Seidel iteration: each page's new rank uses the new ranks of
+    the pages before it in the same sweep. A sweep is a sparse triangular
+    solve with (I - d * lower(M)), factored once up front.
+    Return a tuple (ranks, residuals).
+    """
+    n = matrix.shape[0]
+    lower = sparse.tril(matrix, k=-1, format="csc")
+    upper = sparse.triu(matrix, k=0, format="csr")
+    system = splu(
+        (sparse.identity(n, format="csc") - damping_factor * lower).tocsc(),
+        permc_spec="NATURAL"
+    )
+
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for _ in range(max_iterations):
+        # Dangling rank is taken from the previous sweep
+        constant = (1 - damping_factor + damping_factor * ranks[dangling].sum()) / n
+        new_ranks = system.solve(damping_factor * (upper @ ranks) + constant)
+        new_ranks /= new_ranks.sum()
+        residuals.append(float(np.abs(new_ranks - ranks).sum()))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def quadratic_solver(matrix, dangling, damping_factor, tolerance, max_iterations):
+    """
+    Power iteration with periodic quadratic extrapolation, which removes
+    the two next largest eigenvector components from the last four
+    iterates (Kamvar et al., 2003).
+    Return a tuple (ranks, residuals).
+    """
+    def quadratic(history):
+        x0, x1, x2, x3 = history
+        y = np.column_stack([x1 - x0, x2 - x0])
+        gamma = np.linalg.lstsq(y, -(x3 - x0), rcond=None)[0]
+        g1, g2, g3 = gamma[0], gamma[1], 1
+        return (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+
+    return extrapolated_solver(matrix, dangling, damping_factor, tolerance,
+                               max_iterations, quadratic, 4)
+
+
+def extrapolated_solver(matrix, dangling, damping_factor, tolerance, max_iterations,
+                        extrapolate, needed):
+    """
+    Run power iteration, replacing the ranks with `extrapolate` of the
+    last `needed` iterates every EXTRAPOLATE_EVERY iterations, but only
+    when a power step from the extrapolated ranks changes them less than
+    the step just taken did. The checking step is reused as the next
+    iteration when the extrapolation is kept.
+    Return a tuple (ranks, residuals).
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    history = [ranks]
+    residuals = []
+    following = None
+    for iteration in range(1, max_iterations + 1):
+        if following is None:
+            new_ranks = step(matrix, dangling, damping_factor, ranks)
+        else:
+            new_ranks, following = following, None
+        history = (history + [new_ranks])[-needed:]
+        if iteration % EXTRAPOLATE_EVERY == 0 and len(history) == needed:
+            extrapolated = extrapolate(history)
+
+            # Drop the step if extrapolation left the probability simplex
+            # or moved the ranks further from the fixed point
+            if np.all(extrapolated >= 0) and extrapolated.sum() > 0:
+                extrapolated = extrapolated / extrapolated.sum()
+                checked = step(matrix, dangling, damping_factor, extrapolated)
+                if np.abs(checked - extrapolated).sum() < np.abs(new_ranks - ranks).sum():
+                    new_ranks, following = extrapolated, checked
+                    history = [new_ranks]
+
+        residuals.append(float(np.abs(new_ranks - ranks).sum()))
+        ranks = new_ranks
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def adaptive_solver(matrix, dangling, damping_factor, tolerance, max_iterations):
+    """
+    Experimental adaptive power iteration: once a page's rank has changed
+    by less than FREEZE * tolerance relative to its value for STREAK
+    iterations in a row, stop recomputing it, so later iterations only
+    multiply the rows of pages still moving. Dangling pages are never
+    frozen, since their rank is spread over every page. Every REFRESH
+    iterations, and before stopping, all pages are updated again so that
+    frozen pages which drifted rejoin the active set.
+    Return a tuple (ranks, residuals).
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    settled = np.zeros(n, dtype=np.int32)
+    freeze = np.where(dangling, 0, FREEZE * tolerance)
+    everything = active = np.arange(n)
+    is_active = np.ones(n, dtype=bool)
+    rows = matrix
+    residuals = []
+    verify = False
+    for iteration in range(1, max_iterations + 1):
+        full = verify or len(active) == n or iteration % REFRESH == 0
+        current = slice(None) if full else active
+        following = (matrix if full else rows) @ ranks + ranks[dangling].sum() / n
+        updated = (1 - damping_factor) / n + damping_factor * following
+
+        change = np.abs(updated - ranks[current])
+        if full:
+            ranks = updated
+        else:
+            ranks[current] = updated
+        residuals.append(float(change.sum()))
+
+        # Only a change measured over every page shows convergence
+        if residuals[-1] < tolerance:
+            if full:
+                break
+            verify = True
+            continue
+        verify = False
+
+        # Count how long each page has stayed settled, and drop those
+        # that have for long enough, rebuilding the row slice only once
+        # enough have settled to pay for it or a frozen page has drifted
+        streak = (settled[current] + 1) * (change < freeze[current] * updated)
+        settled[current] = streak
+        keep = streak < STREAK
+        if full:
+            moving = np.flatnonzero(keep)
+            if len(moving) >= SHRINK * n:
+                moving = everything
+            elif len(moving) >= SHRINK * len(active) and not np.any(keep & ~is_active):
+                continue
+        else:
+            moving = active[keep]
+            if len(moving) >= SHRINK * len(active):
+                continue
+        if moving is not active:
+            active = moving
+            rows = matrix if len(active) == n else matrix[active]
+            is_active[:] = False
+            is_active[active] = True
+    return ranks, residuals
+
+
+# Solvers by name. "adaptive" is experimental: it takes as many
+# iterations as "power" and, on corpora with few links per page, more
+# wall time, since tracking settled pages costs about what it saves.
+SOLVERS = {
+    "power": power_solver,
+    "gauss-seidel": gauss_seidel_solver,
+    "quadratic": quadratic_solver,
+    "adaptive": adaptive_solver
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import time
+
+import bitboard
+import tictactoe as ttt
+
+# Each search, and the module holding its stats
+SEARCHES = [
+    ("full_minimax", ttt, ttt.full_minimax),
+    ("alphabeta_minimax", ttt, ttt.alphabeta_minimax),
+    ("minimax (mnk)", ttt, ttt.minimax),
+    ("bitboard", bitboard, bitboard.minimax)
+]
+
+
+def main():
+    # Search without the book until the end
+    ttt.book, ttt.book_loaded = None, True
+
+    # The first move searches the most positions
+    board = ttt.initial_state()
+    print("First move from the empty board")
+    ttt.table.clear()
+    bitboard.table.clear()
+    for name, module, search in SEARCHES:
+        elapsed = time_search(search, board)
+        print(f"  {name}: {module.stats['nodes']} nodes, "
+              f"{module.stats['table_hits']} table hits, {elapsed * 1000:.2f} ms")
+
+    # A second search reuses the transposition table
+    print("Second search from the empty board")
+    for name, module, search in SEARCHES[1:]:
+        elapsed = time_search(search, board)
+        print(f"  {name}: {module.stats['nodes']} nodes, {elapsed * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    ttt.book = ttt.load_book()
+    elapsed = time.perf_counter() - start
+    if ttt.book is None:
+        print("No book; run book.py to write one")
+    else:
+        print(f"Book loaded in {elapsed * 1000:.2f} ms")
+        elapsed = time_search(ttt.minimax, board)
+        print(f"  minimax from book: {ttt.stats['book_hits']} book hits, {elapsed * 1000:.3f} ms")
+
+
+def time_search(search, board):
+    """
+    Time one search from `board`.
+    """
+    start = time.perf_counter()
+    search(board)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A position is two 9-bit integers, one for X and one for O, where bit
+3 * i + j is set if that player holds cell (i, j). The functions named
+like those in tictactoe.py take the list-of-lists board, so runner.py
+can import this module in its place.
+"""
+
+import math
+
+from tictactoe import EMPTY, MOVE_ORDER, O, SYMMETRIES, X
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals as bit masks
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Whether each of the 512 sets of cells contains a line
+WINNING = [any(cells & mask == mask for mask in WIN_MASKS) for cells in range(FULL + 1)]
+
+# Empty cells of each of the 512 sets of empty cells, in MOVE_ORDER
+MOVES = [
+    tuple(3 * i + j for i, j in MOVE_ORDER if empty >> (3 * i + j) & 1)
+    for empty in range(FULL + 1)
+]
+
+# Each set of cells mapped through each of the 8 board symmetries
+PERMUTED = [
+    [sum(1 << k for k in range(9) if cells >> symmetry[k] & 1) for cells in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+
+# Whether a transposition table value is exact or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Values of searched positions, keyed by canonical position, kept across moves
+table = dict()
+
+# Positions visited by the most recent search
+stats = {"nodes": 0, "table_hits": 0}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of (x, o) bitboards.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def to_move(x, o):
+    """
+    Returns the player who has the next turn.
+    """
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def moves(x, o):
+    """
+    Returns the empty cells, as bit indices, in MOVE_ORDER.
+    """
+    return MOVES[FULL & ~(x | o)]
+
+
+def play(x, o, cell):
+    """
+    Returns the bitboards after the player to move takes bit index `cell`.
+    """
+    if (x | o) >> cell & 1:
+        raise Exception("Not a possible move")
+    if x.bit_count() == o.bit_count():
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def winner_of(x, o):
+    """
+    Returns the winner, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def is_terminal(x, o):
+    """
+    Returns True if the game is over.
+    """
+    return WINNING[x] or WINNING[o] or x | o == FULL
+
+
+def value(x, o):
+    """
+    Returns 1 if X has won, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns the same key for a position and all of its rotations and reflections.
+    """
+    return min(permuted[x] << 9 | permuted[o] for permuted in PERMUTED)
+
+
+def best_move(x, o):
+    """
+    Returns the optimal cell, as a bit index, for the player to move,
+    or None if the game is over.
+    """
+    stats["nodes"] = 0
+    stats["table_hits"] = 0
+    if is_terminal(x, o):
+        return None
+
+    maximizing = x.bit_count() == o.bit_count()
+    best = -math.inf if maximizing else math.inf
+    move = None
+    for cell in moves(x, o):
+        if maximizing:
+            score = search(x | 1 << cell, o, best, math.inf)
+            if score > best:
+                best, move = score, cell
+        else:
+            score = search(x, o | 1 << cell, -math.inf, best)
+            if score < best:
+                best, move = score, cell
+
+        # Nothing beats a win
+        if best == (1 if maximizing else -1):
+            break
+
+    return move
+
+
+def search(x, o, alpha, beta):
+    """
+    Returns the minimax value of the position, or a bound on it outside
+    the window (alpha, beta).
+    """
+    stats["nodes"] += 1
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    if x | o == FULL:
+        return 0
+
+    key = canonical(x, o)
+    if key in table:
+        stats["table_hits"] += 1
+        v, flag = table[key]
+        if flag == EXACT:
+            return v
+        if flag == LOWER:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            return v
+
+    window = (alpha, beta)
+    maximizing = x.bit_count() == o.bit_count()
+    v = -math.inf if maximizing else math.inf
+    for cell in MOVES[FULL & ~(x | o)]:
+        if maximizing:
+            v = max(v, search(x | 1 << cell, o, alpha, beta))
+            alpha = max(alpha, v)
+        else:
+            v = min(v, search(x, o | 1 << cell, alpha, beta))
+            beta = min(beta, v)
+        if alpha >= beta:
+            break
+
+    if v <= window[0]:
+        table[key] = (v, UPPER)
+    elif v >= window[1]:
+        table[key] = (v, LOWER)
+    else:
+        table[key] = (v, EXACT)
+    return v
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return to_board(0, 0)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return to_move(*from_board(board))
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {divmod(cell, 3) for cell in moves(*from_board(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = from_board(board)
+    return to_board(*play(x, o, 3 * action[0] + action[1]))
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return winner_of(*from_board(board))
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return is_terminal(*from_board(board))
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return value(*from_board(board))
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    cell = best_move(*from_board(board))
+    return None if cell is None else divmod(cell, 3)
@@ -0,0 +1,89 @@
+"""
+Perfect-play table for every legal tic-tac-toe position
+
+Run once to write the table that tictactoe.minimax answers from.
+"""
+
+import sys
+import time
+
+import tictactoe as ttt
+from bitboard import FULL, MOVES, is_terminal, value
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) > 1 else ttt.BOOK
+
+    start = time.perf_counter()
+    entries = solve_all()
+    write_book(entries, path)
+    elapsed = time.perf_counter() - start
+    print(f"Solved {len(entries)} positions in {elapsed * 1000:.1f} ms, wrote {path}")
+
+    start = time.perf_counter()
+    ttt.load_book(path)
+    elapsed = time.perf_counter() - start
+    print(f"Loaded in {elapsed * 1000:.2f} ms")
+
+
+def solve_all():
+    """
+    Solve every position reachable from the empty board.
+
+    Return a dictionary from (x, o) bitboards to (value, cell), where
+    `value` is the game's value with perfect play and `cell` the bit
+    index of the best move, or None if the game is over. Among moves of
+    equal value, the fastest win or slowest loss is chosen.
+    """
+    entries = dict()
+    scores = dict()
+
+    def score(x, o):
+        # Positive if X wins, larger the sooner; zero for a draw
+        if (x, o) in scores:
+            return scores[(x, o)]
+        empty = (FULL & ~(x | o)).bit_count()
+        if is_terminal(x, o):
+            entries[(x, o)] = (value(x, o), None)
+            scores[(x, o)] = value(x, o) * (empty + 1)
+            return scores[(x, o)]
+
+        maximizing = x.bit_count() == o.bit_count()
+        best = None
+        for cell in MOVES[FULL & ~(x | o)]:
+            if maximizing:
+                s = score(x | 1 << cell, o)
+            else:
+                s = score(x, o | 1 << cell)
+            if best is None or (s > best[0] if maximizing else s < best[0]):
+                best = (s, cell)
+
+        entries[(x, o)] = ((best[0] > 0) - (best[0] < 0), best[1])
+        scores[(x, o)] = best[0]
+        return best[0]
+
+    score(0, 0)
+    return entries
+
+
+def write_book(entries, path):
+    """
+    Write solved positions to `path` as ttt.BOOK_MAGIC followed by one
+    byte for each of the 3^9 boards, indexed as in ttt.book_index. The
+    low 4 bits hold the best move's cell, 3 * i + j, or 9 if the game is
+    over, and the next 2 bits hold the value plus 1. Boards that cannot
+    arise in play hold ttt.UNREACHABLE.
+    """
+    table = bytearray([ttt.UNREACHABLE]) * 3 ** 9
+    for (x, o), (v, cell) in entries.items():
+        index = sum(3 ** k * (1 if x >> k & 1 else 2 if o >> k & 1 else 0) for k in range(9))
+        table[index] = (v + 1) << 4 | (9 if cell is None else cell)
+    with open(path, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        f.write(table)
+
+
+if __name__ == "__main__":
+    main()
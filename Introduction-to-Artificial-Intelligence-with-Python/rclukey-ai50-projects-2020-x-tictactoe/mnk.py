@@ -0,0 +1,349 @@
+"""
+m,n,k games: tic-tac-toe generalized to m rows, n columns and k in a row
+
+Search is iterative-deepening alpha-beta with a wall-clock budget per
+move and a pluggable heuristic for positions it cannot search to the end.
+"""
+
+import argparse
+import math
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position, less the number of moves taken to win it
+WIN = 1 << 62
+
+# Nodes searched between checks of the clock
+CHECK_EVERY = 64
+
+# Moves considered are empty cells within this distance of a stone
+NEIGHBORHOOD = 2
+
+# Line directions as (row, column) steps
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# Whether a transposition table value is exact or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Search effort of the most recent call to search
+stats = {"nodes": 0, "depth": 0, "table_hits": 0}
+
+
+class TimeUp(Exception):
+    """
+    Raised inside a search that has used up its time budget.
+    """
+
+
+class Game():
+    """
+    An m,n,k board with incremental win detection and undo. Cell (i, j)
+    is index i * n + j of `cells`.
+    """
+
+    def __init__(self, m, n, k, seed=0):
+        if not 0 < k <= max(m, n):
+            raise ValueError("k must be between 1 and the longer side of the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = [EMPTY] * (m * n)
+        self.history = []
+        self.winner = None
+
+        # Random keys for incremental hashing of positions
+        rng = random.Random(seed)
+        self.keys = {
+            X: [rng.getrandbits(64) for _ in range(m * n)],
+            O: [rng.getrandbits(64) for _ in range(m * n)]
+        }
+        self.hash = 0
+
+        # Every run of k cells in a line, for heuristics
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    ei, ej = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= ei < m and 0 <= ej < n:
+                        self.windows.append(tuple((i + di * s) * n + j + dj * s for s in range(k)))
+
+        # Cells nearest the center first, for move ordering
+        self.order = sorted(
+            range(m * n),
+            key=lambda c: abs(c // n - (m - 1) / 2) + abs(c % n - (n - 1) / 2)
+        )
+
+    @classmethod
+    def from_rows(cls, rows, k):
+        """
+        Returns the game whose board is the list of lists `rows`.
+        """
+        game = cls(len(rows), len(rows[0]), k)
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                if cell is not EMPTY:
+                    game.place(i * game.n + j, cell)
+        return game
+
+    def rows(self):
+        """
+        Returns the board as a list of lists.
+        """
+        return [self.cells[i * self.n:(i + 1) * self.n] for i in range(self.m)]
+
+    def player(self):
+        """
+        Returns the player who has the next turn.
+        """
+        return X if len(self.history) % 2 == 0 else O
+
+    def full(self):
+        return len(self.history) == len(self.cells)
+
+    def terminal(self):
+        return self.winner is not None or self.full()
+
+    def actions(self):
+        """
+        Returns every empty cell.
+        """
+        return [c for c in self.order if self.cells[c] is EMPTY]
+
+    def candidates(self):
+        """
+        Returns the empty cells within NEIGHBORHOOD of a stone, nearest
+        the center first, or the center if the board is empty.
+        """
+        if not self.history:
+            return self.order[:1]
+        near = set()
+        for cell, _ in self.history:
+            i, j = divmod(cell, self.n)
+            for a in range(max(0, i - NEIGHBORHOOD), min(self.m, i + NEIGHBORHOOD + 1)):
+                for b in range(max(0, j - NEIGHBORHOOD), min(self.n, j + NEIGHBORHOOD + 1)):
+                    if self.cells[a * self.n + b] is EMPTY:
+                        near.add(a * self.n + b)
+        return [c for c in self.order if c in near]
+
+    def play(self, cell):
+        """
+        Makes the next player's move at `cell`.
+        """
+        if self.winner is not None or self.cells[cell] is not EMPTY:
+            raise ValueError("Not a possible move")
+        self.place(cell, self.player())
+
+    def place(self, cell, player):
+        """
+        Puts `player`'s stone on `cell`, checking only the lines through it
+        for a win.
+        """
+        self.history.append((cell, self.winner))
+        self.cells[cell] = player
+        self.hash ^= self.keys[player][cell]
+        if self.winner is None and self.wins_at(cell):
+            self.winner = player
+
+    def undo(self):
+        """
+        Takes back the last move.
+        """
+        cell, winner = self.history.pop()
+        self.hash ^= self.keys[self.cells[cell]][cell]
+        self.cells[cell] = EMPTY
+        self.winner = winner
+
+    def wins_at(self, cell):
+        """
+        Returns True if the stone on `cell` completes k in a row.
+        """
+        player = self.cells[cell]
+        i, j = divmod(cell, self.n)
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                a, b = i + sign * di, j + sign * dj
+                while 0 <= a < self.m and 0 <= b < self.n and self.cells[a * self.n + b] == player:
+                    count += 1
+                    a, b = a + sign * di, b + sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+
+def line_heuristic(game):
+    """
+    Returns a score for X: every run of k cells holding only one player's
+    stones counts for that player, more the more stones it holds.
+    """
+    score = 0
+    cells = game.cells
+    for window in game.windows:
+        xs = os = 0
+        for cell in window:
+            if cells[cell] == X:
+                xs += 1
+            elif cells[cell] == O:
+                os += 1
+        if xs and not os:
+            score += 10 ** xs
+        elif os and not xs:
+            score -= 10 ** os
+    return score
+
+
+def search(game, budget=None, heuristic=line_heuristic, max_depth=None):
+    """
+    Returns the best cell for the player to move, or None if the game is
+    over, searching one ply deeper at a time until `budget` seconds have
+    passed, the result is proven, or `max_depth` is reached. The move
+    from the deepest completed search is returned.
+    """
+    stats["nodes"] = 0
+    stats["depth"] = 0
+    stats["table_hits"] = 0
+    if game.terminal():
+        return None
+
+    moves = game.candidates()
+    best = moves[0]
+    deadline = None if budget is None else time.perf_counter() + budget
+    remaining = len(game.cells) - len(game.history)
+    max_depth = remaining if max_depth is None else min(max_depth, remaining)
+    table = dict()
+
+    for depth in range(1, max_depth + 1):
+        try:
+            value = negamax(game, depth, -math.inf, math.inf, 0, table, heuristic, deadline)
+        except TimeUp:
+            break
+        best = table[game.hash][3]
+        stats["depth"] = depth
+
+        # A proven win or loss will not change with more depth
+        if abs(value) > WIN - len(game.cells):
+            break
+
+    return best
+
+
+def negamax(game, depth, alpha, beta, ply, table, heuristic, deadline):
+    """
+    Returns the value of the position for the player to move, or a bound
+    on it outside the window (alpha, beta), searching `depth` more moves.
+    """
+    stats["nodes"] += 1
+    if deadline is not None and stats["nodes"] % CHECK_EVERY == 0:
+        if time.perf_counter() > deadline:
+            raise TimeUp
+
+    # The player who just moved is the only one who can have won
+    if game.winner is not None:
+        return ply - WIN
+    if game.full():
+        return 0
+    if depth == 0:
+        return heuristic(game) if game.player() == X else -heuristic(game)
+
+    entry = table.get(game.hash)
+    first = None
+    if entry is not None:
+        entry_depth, value, flag, first = entry
+        if entry_depth >= depth:
+            stats["table_hits"] += 1
+            value = from_table(value, ply, len(game.cells))
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+    # Try the best move from a shallower search first
+    moves = game.candidates()
+    if first is not None and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+
+    window = (alpha, beta)
+    best, best_move = -math.inf, None
+    for cell in moves:
+        game.play(cell)
+        try:
+            score = -negamax(game, depth - 1, -beta, -alpha, ply + 1, table, heuristic, deadline)
+        finally:
+            game.undo()
+        if score > best:
+            best, best_move = score, cell
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+
+    if best <= window[0]:
+        flag = UPPER
+    elif best >= window[1]:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table[game.hash] = (depth, to_table(best, ply, len(game.cells)), flag, best_move)
+    return best
+
+
+def to_table(value, ply, size):
+    """
+    Returns a win or loss value counted from this position rather than
+    from the root, so it can be reused at any ply.
+    """
+    if value > WIN - size:
+        return value + ply
+    if value < size - WIN:
+        return value - ply
+    return value
+
+
+def from_table(value, ply, size):
+    """
+    Returns a value stored by to_table counted from the root again.
+    """
+    if value > WIN - size:
+        return value - ply
+    if value < size - WIN:
+        return value + ply
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python mnk.py [--budget SECONDS] m n k")
+    parser.add_argument("m", type=int)
+    parser.add_argument("n", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Let the engine play itself and show each move
+    game = Game(args.m, args.n, args.k)
+    while not game.terminal():
+        player = game.player()
+        start = time.perf_counter()
+        cell = search(game, args.budget)
+        elapsed = time.perf_counter() - start
+        game.play(cell)
+        print(f"{player} plays {divmod(cell, game.n)}: depth {stats['depth']}, "
+              f"{stats['nodes']} nodes, {elapsed:.2f} s")
+
+    for row in game.rows():
+        print(" ".join(cell or "." for cell in row))
+    print(f"Winner: {game.winner}" if game.winner else "Draw")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,50 @@ Tic Tac Toe Player
 """
 
 import math
+import os
+
+import mnk
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Moves tried first by alpha-beta: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# The 8 rotations and reflections of the board, each given as the cell
+# (as index 3 * i + j) that every cell of the transformed board comes from
+SYMMETRIES = [
+    [3 * i + j for i, j in cells] for cells in (
+        [(i, j) for i in range(3) for j in range(3)],
+        [(2 - j, i) for i in range(3) for j in range(3)],
+        [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+        [(j, 2 - i) for i in range(3) for j in range(3)],
+        [(i, 2 - j) for i in range(3) for j in range(3)],
+        [(2 - i, j) for i in range(3) for j in range(3)],
+        [(j, i) for i in range(3) for j in range(3)],
+        [(2 - j, 2 - i) for i in range(3) for j in range(3)]
+    )
+]
+
+# Whether a transposition table value is exact or only a bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Values of searched positions, keyed by canonical board, kept across moves
+table = dict()
+
+# Positions visited by the most recent search
+stats = {"nodes": 0, "table_hits": 0, "book_hits": 0}
+
+# Perfect-play table written by book.py, loaded by the first minimax call
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_MAGIC = b"TTTBOOK1"
+UNREACHABLE = 0xFF
+book = None
+book_loaded = False
+
 
 def initial_state():
     """
@@ -92,9 +131,9 @@ def winner(board):
         
         # Verticals
         elif board[0][0] == X and board[1][0] == X and board[2][0] == X or board[0][1] == X and board[1][1] == X and board[2][1] == X or board[0][2] == X and board[1][2] == X and board[2][2] == X:
-            end = X
+            win = X
         elif board[0][0] == O and board[1][0] == O and board[2][0] == O or board[0][1] == O and board[1][1] == O and board[2][1] == O or board[0][2] == O and board[1][2] == O and board[2][2] == O:
-            end = O
+            win = O
         
         # Diagonals
         elif board[0][0] == X and board[1][1] == X and board[2][2] == X or board[0][2] == X and board[1][1] == X and board[2][0] == X:
@@ -139,7 +178,7 @@ def terminal(board):
     # Diagonals
     elif board[0][0] == X and board[1][1] == X and board[2][2] == X or board[0][0] == O and board[1][1] == O and board[2][2] == O:
         end = True
-    elif board[2][0] == X and board[1][1] == X and board[2][0] == X or board[0][2] == O and board[1][1] == O and board[2][0] == O:
+    elif board[0][2] == X and board[1][1] == X and board[2][0] == X or board[0][2] == O and board[1][1] == O and board[2][0] == O:
         end = True
     
     return end
@@ -161,8 +200,99 @@ def utility(board):
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+
+    Answers from the table written by book.py if there is one, and
+    otherwise searches the position to the end with mnk.search.
     """
-    
+    global book, book_loaded
+    stats["nodes"] = 0
+    stats["table_hits"] = 0
+    stats["book_hits"] = 0
+    if not book_loaded:
+        book = load_book()
+        book_loaded = True
+
+    if book is not None:
+        entry = book[book_index(board)]
+        if entry != UNREACHABLE:
+            stats["book_hits"] += 1
+            cell = entry & 0xF
+            return None if cell == 9 else divmod(cell, 3)
+
+    if terminal(board):
+        return None
+    cell = mnk.search(mnk.Game.from_rows(board, 3))
+    stats["nodes"] = mnk.stats["nodes"]
+    stats["table_hits"] = mnk.stats["table_hits"]
+    return divmod(cell, 3)
+
+
+def alphabeta_minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching with alpha-beta pruning, trying moves in MOVE_ORDER and
+    sharing values between symmetric positions through `table`.
+    """
+    stats["nodes"] = 0
+    stats["table_hits"] = 0
+    stats["book_hits"] = 0
+    if terminal(board):
+        return None
+
+    maximizing = player(board) == X
+    best = -math.inf if maximizing else math.inf
+    move = None
+    for action in ordered_actions(board):
+        if maximizing:
+            score = alphabeta(result(board, action), best, math.inf)
+            if score > best:
+                best, move = score, action
+        else:
+            score = alphabeta(result(board, action), -math.inf, best)
+            if score < best:
+                best, move = score, action
+
+        # Nothing beats a win
+        if best == (1 if maximizing else -1):
+            break
+
+    return move
+
+
+def load_book(path=BOOK):
+    """
+    Returns the table written by book.py to `path`, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if data[:len(BOOK_MAGIC)] != BOOK_MAGIC or len(data) != len(BOOK_MAGIC) + 3 ** 9:
+        raise ValueError(f"{path} is not a tic-tac-toe book")
+    return data[len(BOOK_MAGIC):]
+
+
+def book_index(board):
+    """
+    Returns the board's index in the book: cell (i, j) is digit 3 * i + j
+    of a base 3 number, 0 if empty, 1 for X and 2 for O.
+    """
+    index = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            index = index * 3 + (1 if cell == X else 2 if cell == O else 0)
+    return index
+
+
+def full_minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the full game tree without pruning or memoization.
+    """
+    stats["nodes"] = 0
+    stats["table_hits"] = 0
+    stats["book_hits"] = 0
     move = ()
     
     if player(board) == X:
@@ -184,7 +314,68 @@ def minimax(board):
     return move
 
 
+def alphabeta(board, alpha, beta):
+    """
+    Returns the minimax value of the board, or a bound on it outside the
+    window (alpha, beta).
+    """
+    stats["nodes"] += 1
+    if terminal(board):
+        return utility(board)
+
+    key = canonical(board)
+    if key in table:
+        stats["table_hits"] += 1
+        value, flag = table[key]
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    window = (alpha, beta)
+    maximizing = player(board) == X
+    v = -math.inf if maximizing else math.inf
+    for action in ordered_actions(board):
+        score = alphabeta(result(board, action), alpha, beta)
+        if maximizing:
+            v = max(v, score)
+            alpha = max(alpha, v)
+        else:
+            v = min(v, score)
+            beta = min(beta, v)
+        if alpha >= beta:
+            break
+
+    if v <= window[0]:
+        table[key] = (v, UPPER)
+    elif v >= window[1]:
+        table[key] = (v, LOWER)
+    else:
+        table[key] = (v, EXACT)
+    return v
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board in MOVE_ORDER.
+    """
+    return [action for action in MOVE_ORDER if board[action[0]][action[1]] == EMPTY]
+
+
+def canonical(board):
+    """
+    Returns the same key for a board and all of its rotations and reflections.
+    """
+    cells = [cell or "-" for row in board for cell in row]
+    return min("".join(cells[k] for k in symmetry) for symmetry in SYMMETRIES)
+
+
 def max_value(board):
+    stats["nodes"] += 1
     if terminal(board):
         return utility(board)
     else:
@@ -195,6 +386,7 @@ def max_value(board):
 
 
 def min_value(board):
+    stats["nodes"] += 1
     if terminal(board):
         return utility(board)
     else:
@@ -0,0 +1,168 @@
+import argparse
+import csv
+import itertools
+import multiprocessing
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+# Games a worker plays per task
+BATCH_SIZE = 25
+
+COLUMNS = [
+    "engine", "opponent", "side", "games", "wins", "losses", "draws", "moves",
+    "p50_ms", "p90_ms", "p99_ms", "max_ms", "mean_nodes"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python tournament.py [--engines NAME ...] [--games N] "
+              "[--processes N] [--seed S] [--output PATH]"
+    )
+    parser.add_argument("--engines", choices=list(ENGINES), nargs="+",
+                        default=["alphabeta", "bitboard", "mnk", "book", "random"])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="tournament.csv")
+    args = parser.parse_args()
+
+    # Every engine plays every engine, including itself, from both sides
+    matchups = list(itertools.product(args.engines, repeat=2))
+    tasks = [
+        (x, o, range(start, min(start + BATCH_SIZE, args.games)), args.seed)
+        for x, o in matchups
+        for start in range(0, args.games, BATCH_SIZE)
+    ]
+
+    start = time.perf_counter()
+    games = {matchup: [] for matchup in matchups}
+    with multiprocessing.Pool(args.processes) as pool:
+        for x, o, results in pool.imap_unordered(play_games, tasks):
+            games[(x, o)].extend(results)
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for (x, o), results in games.items():
+        rows.append(summarize(x, o, X_SIDE, results))
+        rows.append(summarize(o, x, O_SIDE, results))
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    total = len(matchups) * args.games
+    print(f"Played {total} games in {elapsed:.1f} s, report written to {args.output}")
+    for row in rows:
+        if row["side"] == X_SIDE:
+            print(f"  {row['engine']} (X) vs {row['opponent']} (O): {row['wins']} X wins, "
+                  f"{row['losses']} O wins, {row['draws']} draws")
+
+
+def full_engine(board, rng):
+    return ttt.full_minimax(board), ttt.stats["nodes"]
+
+
+def alphabeta_engine(board, rng):
+    return ttt.alphabeta_minimax(board), ttt.stats["nodes"]
+
+
+def mnk_engine(board, rng):
+    cell = mnk.search(mnk.Game.from_rows(board, 3))
+    return divmod(cell, 3), mnk.stats["nodes"]
+
+
+def bitboard_engine(board, rng):
+    return bitboard.minimax(board), bitboard.stats["nodes"]
+
+
+def book_engine(board, rng):
+    return ttt.minimax(board), ttt.stats["nodes"]
+
+
+def random_engine(board, rng):
+    return rng.choice(sorted(ttt.actions(board))), 0
+
+
+# Each engine takes a board and a random number generator and returns
+# its move and the number of positions it searched. Transposition tables
+# are kept between moves and games, as they are in runner.py.
+ENGINES = {
+    "full": full_engine,
+    "alphabeta": alphabeta_engine,
+    "mnk": mnk_engine,
+    "bitboard": bitboard_engine,
+    "book": book_engine,
+    "random": random_engine
+}
+
+X_SIDE = "X"
+O_SIDE = "O"
+
+
+def play_games(task):
+    """
+    Play a batch of games between engine `x` as X and engine `o` as O.
+    Game `i` draws its random moves from a generator seeded by `seed`
+    and `i`, so results do not depend on which worker plays it.
+
+    Return (x, o, results) with one (winner, x_moves, o_moves) tuple per
+    game, where the moves are lists of (seconds, nodes).
+    """
+    x, o, indices, seed = task
+    engines = {ttt.X: ENGINES[x], ttt.O: ENGINES[o]}
+    results = []
+    for i in indices:
+        rng = random.Random(f"{seed}-{i}")
+        board = ttt.initial_state()
+        moves = {ttt.X: [], ttt.O: []}
+        while not ttt.terminal(board):
+            player = ttt.player(board)
+            start = time.perf_counter()
+            action, nodes = engines[player](board, rng)
+            moves[player].append((time.perf_counter() - start, nodes))
+            board = ttt.result(board, action)
+        results.append((ttt.winner(board), moves[ttt.X], moves[ttt.O]))
+    return x, o, results
+
+
+def summarize(engine, opponent, side, results):
+    """
+    Return the report row for `engine` playing `side` against `opponent`.
+    """
+    other = O_SIDE if side == X_SIDE else X_SIDE
+    moves = [move for result in results for move in result[1 if side == X_SIDE else 2]]
+    latencies = sorted(seconds for seconds, _ in moves)
+    nodes = [n for _, n in moves]
+    return {
+        "engine": engine,
+        "opponent": opponent,
+        "side": side,
+        "games": len(results),
+        "wins": sum(1 for result in results if result[0] == side),
+        "losses": sum(1 for result in results if result[0] == other),
+        "draws": sum(1 for result in results if result[0] is None),
+        "moves": len(moves),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0,
+        "mean_nodes": round(sum(nodes) / len(nodes), 1) if nodes else 0
+    }
+
+
+def percentile(ordered, p):
+    """
+    Return the `p`th percentile of a sorted list, or 0 if it is empty.
+    """
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+if __name__ == "__main__":
+    main()